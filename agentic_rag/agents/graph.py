@@ -0,0 +1,75 @@
+# graph.py
+import os
+import sys
+
+# Shared utilities (tracing) live under ../rag/utils
+RAG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rag")
+if RAG_DIR not in sys.path:
+    sys.path.append(RAG_DIR)
+
+from typing import TypedDict, Dict, Any, Annotated
+from langgraph.graph import StateGraph, START,END
+from utils.tracing import tracer
+from orchestrator_agent import OrchestratorAgent
+from policy_agent import PolicyAgent
+from claims_agent import ClaimsAgent
+from reasoning_agent import ReasoningAgent
+from fallback_agent import FallbackAgent
+
+def merge_dicts(left, right):
+    """Reducer so parallel branches can each write their own key."""
+    return {**(left or {}), **(right or {})}
+
+class AgentState(TypedDict):
+    query: str
+    intent: str
+    answer: str
+    context: Dict[str, Any]
+    branch_answers: Annotated[Dict[str, str], merge_dicts]
+
+
+def build_workflow(retriever, orchestrator_node=None):
+    """Build and compile the agent DAG around a retriever (and optionally a prebuilt orchestrator)."""
+    orchestrator_node = orchestrator_node or OrchestratorAgent()
+    policy_node = PolicyAgent(retriever)
+    claims_node = ClaimsAgent(retriever)
+    reasoning_node = ReasoningAgent(retriever)
+    fallback_node = FallbackAgent()
+
+    # Build LangGraph DAG
+    graph = StateGraph(state_schema=AgentState,entry_point="orchestrator")
+
+    graph.add_node("orchestrator", tracer.traced("node.orchestrator")(orchestrator_node.run))
+    graph.add_node("policy_agent", tracer.traced("node.policy_agent")(policy_node.run))
+    graph.add_node("claims_agent", tracer.traced("node.claims_agent")(claims_node.run))
+    graph.add_node("reasoning_agent", tracer.traced("node.reasoning_agent")(reasoning_node.fan_out))
+    graph.add_node("reasoning_policy", tracer.traced("node.reasoning_policy")(reasoning_node.policy_branch))
+    graph.add_node("reasoning_claims", tracer.traced("node.reasoning_claims")(reasoning_node.claims_branch))
+    graph.add_node("reasoning_join", tracer.traced("node.reasoning_join")(reasoning_node.join))
+    graph.add_node("fallback_agent", tracer.traced("node.fallback_agent")(fallback_node.run))
+
+    # Conditional routing based on intent
+    graph.add_conditional_edges(
+        "orchestrator",
+        lambda state: state["intent"],
+        {
+            "policy": "policy_agent",
+            "claims": "claims_agent",
+            "reasoning": "reasoning_agent",
+            "fallback": "fallback_agent"
+        }
+    )
+
+    # Reasoning fans out to policy + claims in parallel, then joins
+    graph.add_edge("reasoning_agent", "reasoning_policy")
+    graph.add_edge("reasoning_agent", "reasoning_claims")
+    graph.add_edge(["reasoning_policy", "reasoning_claims"], "reasoning_join")
+
+    # All nodes go to END
+    graph.add_edge("policy_agent", END)
+    graph.add_edge("claims_agent", END)
+    graph.add_edge("reasoning_join", END)
+    graph.add_edge("fallback_agent", END)
+    graph.add_edge(START, "orchestrator")
+
+    return graph.compile()
@@ -0,0 +1,93 @@
+# intent_router.py
+import numpy as np
+
+# Labelled example queries used to build the intent prototypes
+INTENT_EXAMPLES = {
+    "policy": [
+        "What does the Medicaid policy cover?",
+        "Am I eligible for Medicaid?",
+        "What are the eligibility requirements for coverage?",
+        "Is maternity care covered under my plan?",
+        "Which services are included in my benefits?",
+        "Does the policy cover preventive care?",
+        "What are the coverage rules for hospitalization?",
+        "Who qualifies for the program?",
+    ],
+    "claims": [
+        "What is the status of my claim?",
+        "How long does claim processing take?",
+        "When will I get my reimbursement?",
+        "How do I submit a claim?",
+        "My claim was submitted last week, any update?",
+        "I want to file a reimbursement request.",
+        "Has my provider been paid for the visit?",
+        "Where can I check my payment status?",
+    ],
+    "reasoning": [
+        "Why was my claim denied?",
+        "How does eligibility affect my claim?",
+        "Explain why my reimbursement was rejected.",
+        "Why am I not covered for this service?",
+        "How do the coverage rules apply to my denied claim?",
+        "What is the reason my claim was not paid under my policy?",
+        "Why did my benefits change?",
+        "How come my provider payment was reduced?",
+    ],
+}
+
+
+class IntentRouter:
+    """
+    Embedding-based intent classifier.
+    Example embeddings are stacked into one normalised matrix at startup, so
+    scoring a query is a single matrix multiply plus a per-intent max.
+    """
+    def __init__(self, embed_fn, examples=None, threshold=0.35, fallback="fallback"):
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.fallback = fallback
+
+        examples = examples or INTENT_EXAMPLES
+        empty = [intent for intent, texts in examples.items() if not texts]
+        if empty:
+            # reduceat over an empty group would copy the next intent's score
+            raise ValueError(f"Intents with no examples: {empty}")
+        self.intents = list(examples)
+        texts, offsets = [], []
+        for intent in self.intents:
+            offsets.append(len(texts))
+            texts.extend(examples[intent])
+
+        # (n_examples, dim), rows grouped by intent; offsets mark group starts
+        self.prototypes = self._normalize(np.asarray(self.embed_fn(texts), dtype=np.float32))
+        self.offsets = np.asarray(offsets)
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    # ------------------------------------------------------------
+    def score_embeddings(self, query_embeddings):
+        """Cosine score of every query against every intent: (n_queries, n_intents)."""
+        q = self._normalize(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        sims = q @ self.prototypes.T
+        return np.maximum.reduceat(sims, self.offsets, axis=1)
+
+    def classify_embeddings(self, query_embeddings):
+        scores = self.score_embeddings(query_embeddings)
+        best = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(best)), best]
+        return [
+            (self.intents[i] if c >= self.threshold else self.fallback, float(c))
+            for i, c in zip(best, confidence)
+        ]
+
+    def classify_batch(self, queries):
+        """Classify a list of queries with one encoder call. Returns (intent, confidence) pairs."""
+        if not queries:
+            return []
+        return self.classify_embeddings(self.embed_fn(list(queries)))
+
+    def classify(self, query):
+        return self.classify_batch([query])[0]
@@ -1,14 +1,135 @@
 # memory_manager.py
-class MemoryManager:
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+def default_summarize(summary, turns):
+    """Fold evicted turns into the running summary, keeping it bounded."""
+    text = " | ".join(f"{role}: {content}" for role, content in turns)
+    combined = f"{summary} | {text}" if summary else text
+    return combined[-2000:]
+
+
+class SessionMemory:
+    """Short-term buffer for one thread id."""
     def __init__(self):
-        self.short_term = {}
-        self.long_term = {}
+        self.turns = deque()
+        self.summary = ""
+        self.values = {}
+        self.long_term = None  # lazily loaded from the store
+        self.last_access = time.monotonic()
+
+
+class MemoryManager:
+    """
+    Session-scoped memory.
+    Short-term buffers live per thread id, evicted by LRU and TTL; long-term
+    memory is persisted to SQLite and only loaded when a session asks for it.
+    """
+    def __init__(self, db_path="memory.db", max_sessions=1000, ttl_seconds=3600,
+                 max_turns=20, summarize_fn=default_summarize):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.summarize_fn = summarize_fn
+
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS long_term ("
+            " thread_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT,"
+            " PRIMARY KEY (thread_id, key))"
+        )
+        self._db.commit()
+
+    # ------------------------------------------------------------
+    # Session lifecycle
+    # ------------------------------------------------------------
+    def _session(self, thread_id):
+        with self._lock:
+            now = time.monotonic()
+            session = self._sessions.get(thread_id)
+            if session is not None and now - session.last_access > self.ttl_seconds:
+                session = None
+            if session is None:
+                session = SessionMemory()
+                self._sessions[thread_id] = session
+            session.last_access = now
+            self._sessions.move_to_end(thread_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def evict_expired(self):
+        """Drop every short-term buffer idle for longer than the TTL."""
+        with self._lock:
+            cutoff = time.monotonic() - self.ttl_seconds
+            expired = [tid for tid, s in self._sessions.items() if s.last_access < cutoff]
+            for tid in expired:
+                del self._sessions[tid]
+            return len(expired)
+
+    def clear_session(self, thread_id):
+        with self._lock:
+            self._sessions.pop(thread_id, None)
+
+    def session_count(self):
+        return len(self._sessions)
+
+    # ------------------------------------------------------------
+    # Short-term memory
+    # ------------------------------------------------------------
+    def add_turn(self, thread_id, role, content):
+        with self._lock:
+            session = self._session(thread_id)
+            session.turns.append((role, content))
+            if len(session.turns) > self.max_turns:
+                # Summarise the oldest half so the buffer stays bounded
+                evicted = [session.turns.popleft() for _ in range(len(session.turns) // 2)]
+                session.summary = self.summarize_fn(session.summary, evicted)
+
+    def store_short(self, key, value, thread_id="default"):
+        with self._lock:
+            self._session(thread_id).values[key] = value
+
+    # ------------------------------------------------------------
+    # Long-term memory
+    # ------------------------------------------------------------
+    def _load_long(self, thread_id, session):
+        if session.long_term is None:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT key, value FROM long_term WHERE thread_id = ?", (thread_id,)
+                ).fetchall()
+            session.long_term = {key: json.loads(value) for key, value in rows}
+        return session.long_term
 
-    def store_short(self, key, value):
-        self.short_term[key] = value
+    def store_long(self, key, value, thread_id="default"):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO long_term (thread_id, key, value) VALUES (?, ?, ?)",
+                (thread_id, key, json.dumps(value))
+            )
+            self._db.commit()
+            session = self._sessions.get(thread_id)
+            if session is not None and session.long_term is not None:
+                session.long_term[key] = value
 
-    def store_long(self, key, value):
-        self.long_term[key] = value
+    # ------------------------------------------------------------
+    def get_context(self, thread_id="default"):
+        with self._lock:
+            session = self._session(thread_id)
+            return {
+                "short": dict(session.values),
+                "turns": list(session.turns),
+                "summary": session.summary,
+                "long": dict(self._load_long(thread_id, session)),
+            }
 
-    def get_context(self):
-        return {"short": self.short_term, "long": self.long_term}
+    def close(self):
+        self._db.close()
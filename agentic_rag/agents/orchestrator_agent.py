@@ -1,15 +1,23 @@
 # orchestrator_agent.py
+from intent_router import IntentRouter
+
 class OrchestratorAgent:
+    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2", threshold=0.35, router=None):
+        if router is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+            router = IntentRouter(
+                lambda texts: model.encode(texts, convert_to_numpy=True),
+                threshold=threshold
+            )
+        self.router = router
+
     def classify_intent(self, query):
-        q = query.lower()
-        if "policy" in q or "eligibility" in q:
-            return "policy"
-        elif "claim" in q or "reimbursement" in q:
-            return "claims"
-        elif "why" in q or "how" in q:
-            return "reasoning"
-        else:
-            return "fallback"
+        intent, _ = self.router.classify(query)
+        return intent
+
+    def classify_batch(self, queries):
+        return [intent for intent, _ in self.router.classify_batch(queries)]
 
     # This node just passes the query along with intent for graph routing
     def run(self, state):
@@ -1,18 +1,50 @@
 # reasoning_agent.py
+import uuid
 from policy_agent import PolicyAgent
 from claims_agent import ClaimsAgent
+from retrieval_memo import RetrievalMemo
 
 class ReasoningAgent:
     def __init__(self, retriever):
-        self.policy_agent = PolicyAgent(retriever)
-        self.claims_agent = ClaimsAgent(retriever)
+        self.memo = RetrievalMemo(retriever)
 
+    # Sequential path, kept for callers outside the graph
     def run(self, state):
         query = state["query"]
-        policy_resp = self.policy_agent.run({"query": query})["answer"]
-        claim_resp = self.claims_agent.run({"query": query})["answer"]
-        state["answer"] = (f"[Reasoning Agent] Combined reasoning:\n"
-                           f"- Policy Context: {policy_resp}\n"
-                           f"- Claims Context: {claim_resp}\n"
-                           f"→ Final Interpretation: The claim denial might be due to eligibility rules.")
+        request_id = uuid.uuid4().hex
+        retriever = self.memo.scoped(request_id)
+        policy_resp = PolicyAgent(retriever).run({"query": query})["answer"]
+        claim_resp = ClaimsAgent(retriever).run({"query": query})["answer"]
+        self.memo.release(request_id)
+        state["answer"] = self.combine(policy_resp, claim_resp)
         return state
+
+    # ------------------------------------------------------------
+    # Parallel path: fan_out -> (policy_branch | claims_branch) -> join
+    # ------------------------------------------------------------
+    def fan_out(self, state):
+        context = dict(state.get("context") or {})
+        context["request_id"] = uuid.uuid4().hex
+        return {"context": context}
+
+    def policy_branch(self, state):
+        retriever = self.memo.scoped(state["context"]["request_id"])
+        answer = PolicyAgent(retriever).run({"query": state["query"]})["answer"]
+        return {"branch_answers": {"policy": answer}}
+
+    def claims_branch(self, state):
+        retriever = self.memo.scoped(state["context"]["request_id"])
+        answer = ClaimsAgent(retriever).run({"query": state["query"]})["answer"]
+        return {"branch_answers": {"claims": answer}}
+
+    def join(self, state):
+        self.memo.release(state["context"]["request_id"])
+        branches = state.get("branch_answers") or {}
+        return {"answer": self.combine(branches.get("policy"), branches.get("claims"))}
+
+    @staticmethod
+    def combine(policy_resp, claim_resp):
+        return (f"[Reasoning Agent] Combined reasoning:\n"
+                f"- Policy Context: {policy_resp}\n"
+                f"- Claims Context: {claim_resp}\n"
+                f"→ Final Interpretation: The claim denial might be due to eligibility rules.")
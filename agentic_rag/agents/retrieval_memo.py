@@ -0,0 +1,55 @@
+# retrieval_memo.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from utils.tracing import tracer
+
+
+class RetrievalMemo:
+    """
+    Per-request retrieval memo shared by parallel graph branches.
+    The first branch to ask for a query does the lookup; identical lookups in
+    the same request wait on its result instead of hitting the retriever again.
+    """
+    def __init__(self, retriever, max_requests=1024):
+        self.retriever = retriever
+        self.max_requests = max_requests
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def retrieve(self, request_id, query):
+        with self._lock:
+            futures = self._memo.setdefault(request_id, {})
+            self._memo.move_to_end(request_id)
+            # Bound the memo if a request never reached its join node.
+            while len(self._memo) > self.max_requests:
+                self._memo.popitem(last=False)
+            future = futures.get(query)
+            owner = future is None
+            if owner:
+                future = futures[query] = Future()
+            tracer.cache_hit("retrieval_memo", not owner)
+
+        if owner:
+            try:
+                future.set_result(self.retriever.retrieve(query))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def scoped(self, request_id):
+        return _ScopedRetriever(self, request_id)
+
+    def release(self, request_id):
+        with self._lock:
+            self._memo.pop(request_id, None)
+
+
+class _ScopedRetriever:
+    """Retriever view bound to a single request id."""
+    def __init__(self, memo, request_id):
+        self.memo = memo
+        self.request_id = request_id
+
+    def retrieve(self, query):
+        return self.memo.retrieve(self.request_id, query)
@@ -0,0 +1,211 @@
+# server.py
+"""
+ASGI service for the agent workflow.
+
+    uvicorn server:app --host 0.0.0.0 --port 8000
+
+Requests beyond MAX_CONCURRENCY wait in a bounded queue; once MAX_QUEUE
+requests are waiting, new ones get 429 so callers back off instead of piling up.
+A request that times out (504) keeps its slot until the graph run actually
+finishes, so the limit bounds real work, not just waiting callers.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "32"))
+MAX_QUEUE = int(os.getenv("AGENT_MAX_QUEUE", "128"))
+REQUEST_TIMEOUT = float(os.getenv("AGENT_REQUEST_TIMEOUT", "30"))
+WARMUP_QUERY = os.getenv("AGENT_WARMUP_QUERY", "Why was my claim denied under the policy?")
+
+# Request traces: slow requests only by default; RAG_TRACE_LOG_LEVEL=INFO logs every request
+logging.basicConfig(format="%(message)s")
+logging.getLogger("agentic_rag.trace").setLevel(os.getenv("RAG_TRACE_LOG_LEVEL", "WARNING").upper())
+
+
+class QueryRequest(BaseModel):
+    query: str
+    thread_id: str = "default"
+
+
+class AdmissionController:
+    """Global concurrency limit with a bounded wait queue."""
+    def __init__(self, max_concurrency, max_queue):
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.active = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self):
+        """Take a slot (or raise 429); returns an idempotent release callable."""
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            raise HTTPException(status_code=429, detail="Server busy, retry later.",
+                                headers={"Retry-After": "1"})
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.active -= 1
+                self._slots.release()
+        return release
+
+    @asynccontextmanager
+    async def slot(self):
+        release = await self.acquire()
+        try:
+            yield
+        finally:
+            release()
+
+
+state = {"ready": False, "workflow": None, "memory": None, "admission": None, "tracer": None}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Importing main builds every agent and compiles the graph
+    import main
+    from utils.tracing import tracer
+    state["tracer"] = tracer
+    state["workflow"] = main.workflow
+    state["memory"] = main.memory
+    state["admission"] = AdmissionController(MAX_CONCURRENCY, MAX_QUEUE)
+
+    # One warm-up run so model weights and connections are hot before traffic
+    start = time.perf_counter()
+    await main.workflow.ainvoke({"query": WARMUP_QUERY})
+    print(f"✅ Workflow warmed up in {time.perf_counter() - start:.2f}s")
+
+    state["ready"] = True
+    yield
+    state["ready"] = False
+
+
+app = FastAPI(title="Agentic RAG", lifespan=lifespan)
+
+
+def _require_ready():
+    if not state["ready"]:
+        raise HTTPException(status_code=503, detail="Service is warming up.")
+
+
+def _hold_slot(task, release):
+    """
+    Keep the admission slot until `task` has really finished. A timeout only stops
+    waiting for the graph; its sync nodes keep running in executor threads, so the
+    slot must stay taken or MAX_CONCURRENCY stops bounding the actual work.
+    """
+    def done(t):
+        release()
+        if not t.cancelled():
+            t.exception()  # mark as retrieved; timed-out failures are not reported to anyone
+    task.add_done_callback(done)
+
+
+def _record_turns(thread_id, query, answer):
+    state["memory"].add_turn(thread_id, "user", query)
+    state["memory"].add_turn(thread_id, "assistant", answer)
+
+
+# ------------------------------------------------------------
+# Endpoints
+# ------------------------------------------------------------
+@app.post("/invoke")
+async def invoke(req: QueryRequest):
+    _require_ready()
+    release = await state["admission"].acquire()
+
+    async def run():
+        with state["tracer"].request("workflow", thread_id=req.thread_id):
+            return await state["workflow"].ainvoke({"query": req.query})
+
+    task = asyncio.ensure_future(run())
+    _hold_slot(task, release)
+    try:
+        # shield: a timeout or client disconnect stops the wait, not the graph
+        final_state = await asyncio.wait_for(asyncio.shield(task), timeout=REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Request timed out.")
+
+    _record_turns(req.thread_id, req.query, final_state["answer"])
+    return {"intent": final_state.get("intent"), "answer": final_state["answer"]}
+
+
+@app.post("/stream")
+async def stream(req: QueryRequest):
+    _require_ready()
+    # Admit before the response starts so a rejection is still a clean 429
+    release = await state["admission"].acquire()
+    queue = asyncio.Queue()
+    done = object()
+
+    async def produce():
+        # Runs independently of the response, so the slot is held (and released)
+        # with the graph run itself, even if the client never reads or disconnects.
+        answer = None
+        try:
+            with state["tracer"].request("workflow", thread_id=req.thread_id, stream=True):
+                async for update in state["workflow"].astream({"query": req.query}, stream_mode="updates"):
+                    for values in update.values():
+                        if isinstance(values, dict) and values.get("answer"):
+                            answer = values["answer"]
+                    queue.put_nowait(update)
+            if answer is not None:
+                _record_turns(req.thread_id, req.query, answer)
+        except Exception as e:
+            queue.put_nowait({"error": str(e)})
+            raise
+        finally:
+            queue.put_nowait(done)
+
+    task = asyncio.ensure_future(produce())
+    _hold_slot(task, release)
+
+    async def events():
+        deadline = time.monotonic() + REQUEST_TIMEOUT
+        while True:
+            try:
+                update = await asyncio.wait_for(queue.get(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                yield json.dumps({"error": "Request timed out."}) + "\n"
+                return
+            if update is done:
+                return
+            yield json.dumps(update, default=str) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    if state["tracer"] is None:
+        return ""
+    return state["tracer"].export_prometheus()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    _require_ready()
+    admission = state["admission"]
+    return {"status": "ready", "active": admission.active, "waiting": admission.waiting}
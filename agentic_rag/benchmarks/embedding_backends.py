@@ -0,0 +1,109 @@
+"""
+Compare embedding backends (torch vs ONNX vs ONNX int8) on CPU.
+
+    python embedding_backends.py --backends torch onnx onnx-int8
+
+Reports cold startup (fresh interpreter: imports + model load), single-query
+latency, batch throughput over the chunk corpus, and cosine agreement with
+the torch backend, which must stay above --min-cosine for vectors to remain
+compatible with the existing Milvus collection.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+RAG_DIR = os.path.join(PROJECT_DIR, "rag")
+if RAG_DIR not in sys.path:
+    sys.path.append(RAG_DIR)
+
+import numpy as np
+from utils.embedding_backends import cosine_agreement, default_model_dir, export_onnx, get_embedding_backend
+from stand_ins import InProcessVectorIndex
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def cold_startup_seconds(backend):
+    """Time imports + model load in a fresh interpreter, so cached modules don't skew the result."""
+    code = (
+        "import sys, time; t = time.perf_counter(); "
+        f"sys.path.append({RAG_DIR!r}); "
+        "from utils.embedding_backends import get_embedding_backend; "
+        f"get_embedding_backend({backend!r}, {MODEL_NAME!r}).encode(['warm up']); "
+        "print(time.perf_counter() - t)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--queries", default=os.path.join(BENCH_DIR, "queries.json"))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    corpus = InProcessVectorIndex._read_chunks(os.path.join(PROJECT_DIR, "data", "chunks"))
+
+    # Explicit export step: serving code never exports on the fly
+    model_dir = default_model_dir(MODEL_NAME)
+    if any(name.startswith("onnx") for name in args.backends) and \
+            not os.path.exists(os.path.join(model_dir, "model_int8.onnx")):
+        export_onnx(MODEL_NAME, model_dir, quantize=True)
+
+    results, reference, failed = {}, None, False
+    for name in args.backends:
+        startup = cold_startup_seconds(name)
+        backend = get_embedding_backend(name, MODEL_NAME)
+        backend.encode(queries[:2])
+
+        latencies = []
+        for query in queries * 5:
+            t0 = time.perf_counter()
+            backend.encode([query])
+            latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        vectors = backend.encode(corpus, batch_size=args.batch_size)
+        throughput = len(corpus) / (time.perf_counter() - t0)
+
+        result = {
+            "startup_s": startup,
+            "query_latency_ms": {f"p{q}": float(np.percentile(np.asarray(latencies) * 1000, q)) for q in (50, 95)},
+            "throughput_texts_per_s": throughput,
+        }
+        if reference is None and name == "torch":
+            reference = vectors
+        elif reference is not None:
+            agreement = cosine_agreement(reference, vectors)
+            result["cosine_vs_torch"] = agreement
+            if agreement["min"] < args.min_cosine:
+                failed = True
+        results[name] = result
+
+        lat = result["query_latency_ms"]
+        print(f"{name:<10} startup {startup:6.2f}s | query p50 {lat['p50']:6.2f} ms p95 {lat['p95']:6.2f} ms | "
+              f"{throughput:8.1f} texts/s"
+              + (f" | cosine min {result['cosine_vs_torch']['min']:.4f}" if "cosine_vs_torch" in result else ""))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if failed:
+        print(f"\n❌ A backend fell below the cosine tolerance of {args.min_cosine}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
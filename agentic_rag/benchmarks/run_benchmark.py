@@ -0,0 +1,203 @@
+"""
+End-to-end load / latency benchmark for `rag_chain` and the agent `workflow`.
+
+Runs entirely offline: the vector store is an in-process NumPy index over
+data/chunks and the LLM is a fake with configurable latency.
+
+    python run_benchmark.py --target all --concurrency 8 --repeat 5
+    python run_benchmark.py --update-baseline          # record a new baseline
+    python run_benchmark.py --tolerance 0.15           # fail on >15% regressions
+
+Reports throughput, end-to-end and per-stage p50/p95/p99 latency, peak RSS
+and startup time, and exits non-zero when a result regresses past the
+stored baseline (or when no baseline has been recorded yet).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+for path in (os.path.join(PROJECT_DIR, "rag"), os.path.join(PROJECT_DIR, "agents")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+import numpy as np
+from utils.tracing import peak_rss_mb, tracer
+from stand_ins import AgentRetriever, FakeLLM, HashingEmbedder, InProcessRetriever, InProcessVectorIndex
+
+DEFAULT_QUERIES = os.path.join(BENCH_DIR, "queries.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+# ----------------------------------------------------------------------
+# Targets
+# ----------------------------------------------------------------------
+def build_rag_chain_target(index, llm_latency_ms):
+    from generation import build_rag_chain
+    llm = FakeLLM(responses=["This is a benchmark answer."], latency_ms=llm_latency_ms)
+    chain = build_rag_chain(llm=llm, retriever=InProcessRetriever(index=index))
+    return lambda query: chain.invoke({"input": query})
+
+
+def build_workflow_target(index, llm_latency_ms):
+    from graph import build_workflow
+    from intent_router import IntentRouter
+    from orchestrator_agent import OrchestratorAgent
+    orchestrator = OrchestratorAgent(router=IntentRouter(index.embedder.encode, threshold=0.2))
+    workflow = build_workflow(AgentRetriever(index), orchestrator_node=orchestrator)
+    return lambda query: workflow.invoke({"query": query})
+
+
+TARGETS = {"rag_chain": build_rag_chain_target, "workflow": build_workflow_target}
+
+
+# ----------------------------------------------------------------------
+def percentiles_ms(samples):
+    arr = np.asarray(samples) * 1000.0
+    return {f"p{q}": float(np.percentile(arr, q)) for q in (50, 95, 99)}
+
+
+def run_target(name, queries, concurrency, repeat, llm_latency_ms, warmup):
+    start = time.perf_counter()
+    index = InProcessVectorIndex(HashingEmbedder())
+    call = TARGETS[name](index, llm_latency_ms)
+    startup_s = time.perf_counter() - start
+
+    for query in queries[:warmup]:
+        call(query)
+    tracer.reset()
+
+    def one(query):
+        t0 = time.perf_counter()
+        with tracer.request(name):
+            call(query)
+        return time.perf_counter() - t0
+
+    workload = queries * repeat
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, workload))
+    wall = time.perf_counter() - wall_start
+
+    stages = {
+        span: {k: v for k, v in stats.items() if k != "count"}
+        for span, stats in tracer.snapshot()["spans"].items() if span != name
+    }
+    return {
+        "requests": len(workload),
+        "concurrency": concurrency,
+        "throughput_rps": len(workload) / wall,
+        "latency_ms": percentiles_ms(latencies),
+        "stages_ms": stages,
+        "startup_s": startup_s,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_target_isolated(*args):
+    """Run one target in a fresh process so peak RSS (process-wide) is its own."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_target, *args).result()
+
+
+# ----------------------------------------------------------------------
+# Baseline comparison
+# ----------------------------------------------------------------------
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions (empty when everything is within tolerance)."""
+    failures = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            failures.append(f"{name}: no baseline entry; run with --update-baseline to record one")
+            continue
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            failures.append(f"{name}: throughput {current['throughput_rps']:.1f} rps "
+                            f"< baseline {base['throughput_rps']:.1f} rps")
+        for q in ("p50", "p95", "p99"):
+            if current["latency_ms"][q] > base["latency_ms"][q] * (1 + tolerance):
+                failures.append(f"{name}: {q} {current['latency_ms'][q]:.1f} ms "
+                                f"> baseline {base['latency_ms'][q]:.1f} ms")
+        if current["startup_s"] > base["startup_s"] * (1 + tolerance):
+            failures.append(f"{name}: startup {current['startup_s']:.2f}s "
+                            f"> baseline {base['startup_s']:.2f}s")
+        if current["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            failures.append(f"{name}: peak RSS {current['peak_rss_mb']:.0f} MB "
+                            f"> baseline {base['peak_rss_mb']:.0f} MB")
+    return failures
+
+
+def print_report(name, r):
+    lat = r["latency_ms"]
+    print(f"\n=== {name} ({r['requests']} requests, concurrency {r['concurrency']}) ===")
+    print(f"Throughput: {r['throughput_rps']:.1f} req/s")
+    print(f"Latency:    p50 {lat['p50']:.1f} ms | p95 {lat['p95']:.1f} ms | p99 {lat['p99']:.1f} ms")
+    print(f"Startup:    {r['startup_s']:.2f}s   Peak RSS: {r['peak_rss_mb']:.0f} MB")
+    for stage, s in sorted(r["stages_ms"].items()):
+        print(f"  {stage:<24} p50 {s['p50_ms']:8.2f} ms | p95 {s['p95_ms']:8.2f} ms | p99 {s['p99_ms']:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["rag_chain", "workflow", "all"], default="all")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    names = list(TARGETS) if args.target == "all" else [args.target]
+    results = {}
+    for name in names:
+        results[name] = run_target_isolated(name, queries, args.concurrency, args.repeat,
+                                   args.llm_latency_ms, args.warmup)
+        print_report(name, results[name])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        # Merge, so recording one target keeps the others' entries
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        # A missing baseline must not turn the regression gate into a silent pass
+        print(f"\n❌ No baseline at {args.baseline}; run with --update-baseline to record one.")
+        sys.exit(2)
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    failures = compare(results, baseline, args.tolerance)
+    if failures:
+        print("\n❌ PERFORMANCE REGRESSION:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print(f"\n✅ Within {args.tolerance:.0%} of baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Offline stand-ins used by the benchmark suite.
+
+- HashingEmbedder: deterministic bag-of-words feature hashing, no model download.
+- InProcessVectorIndex: NumPy cosine index over the chunk files in data/chunks.
+- InProcessRetriever / AgentRetriever: the index behind the LangChain retriever
+  interface (for rag_chain) and the agents' `.retrieve(query)` interface.
+- FakeLLM: chat model that sleeps for a configurable latency and returns a canned answer.
+"""
+
+import os
+import re
+import time
+import zlib
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.retrievers import BaseRetriever
+
+from utils.tracing import tracer
+
+CHUNKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "chunks")
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", text.lower()):
+                h = zlib.crc32(token.encode())
+                vectors[row, h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class InProcessVectorIndex:
+    def __init__(self, embedder: HashingEmbedder, chunks_dir: str = CHUNKS_DIR):
+        self.embedder = embedder
+        self.texts = self._read_chunks(chunks_dir)
+        self.matrix = embedder.encode(self.texts)
+
+    @staticmethod
+    def _read_chunks(chunks_dir: str) -> List[str]:
+        texts = []
+        for root, _, files in os.walk(chunks_dir):
+            for file in sorted(files):
+                if file.endswith(".txt"):
+                    with open(os.path.join(root, file), "r", encoding="utf-8") as f:
+                        texts.extend(c.strip() for c in f.read().split("[Chunk") if c.strip())
+        return texts
+
+    def search(self, query: str, top_k: int = 3) -> List[Document]:
+        with tracer.span("embed_query"):
+            q = self.embedder.encode([query])[0]
+        with tracer.span("vector_search", top_k=top_k):
+            scores = self.matrix @ q
+            top = np.argpartition(-scores, min(top_k, len(scores) - 1))[:top_k]
+            top = top[np.argsort(-scores[top])]
+        with tracer.span("context_assembly"):
+            return [Document(page_content=self.texts[i], metadata={"score": float(scores[i])})
+                    for i in top]
+
+
+class InProcessRetriever(BaseRetriever):
+    """LangChain retriever over an InProcessVectorIndex (stand-in for MilvusRetriever)."""
+
+    index: Any
+    top_k: int = 3
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.index.search(query, self.top_k)
+
+
+class AgentRetriever:
+    """Agent-side retriever (stand-in for TemporaryRetriever)."""
+
+    def __init__(self, index: InProcessVectorIndex, top_k: int = 3):
+        self.index = index
+        self.top_k = top_k
+
+    def retrieve(self, query):
+        return "\n".join(doc.page_content for doc in self.index.search(query, self.top_k))
+
+
+class FakeLLM(FakeListChatModel):
+    """Chat model with a fixed latency, so LLM time can be dialled in per run."""
+
+    latency_ms: float = 200.0
+
+    def _call(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
+        with tracer.span("llm_call", provider="fake"):
+            time.sleep(self.latency_ms / 1000.0)
+            return self.responses[0]
@@ -8,7 +8,7 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langchain_core.tools import tool
 from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
+from delta_checkpointer import DeltaSqliteSaver
 from langgraph.types import interrupt, Command
 
 
@@ -40,7 +40,7 @@ def chatbot_node(state: State):
     msg = llm_with_tools.invoke(state["messages"])
     return {"messages": [msg]}
 
-memory = MemorySaver()
+memory = DeltaSqliteSaver("checkpoints.db")
 builder = StateGraph(State)
 builder.add_node("chatbot", chatbot_node)
 builder.add_node("tools", ToolNode(tools))
@@ -0,0 +1,414 @@
+"""
+Durable, delta-encoded checkpointer for message-heavy LangGraph threads.
+
+`MemorySaver` keeps every checkpoint in process memory, each holding the full
+`add_messages` list, so a long thread costs quadratic storage and is lost on
+restart. `DeltaSqliteSaver` persists checkpoints to SQLite and only stores what
+changed since the parent checkpoint:
+
+- channels that did not change are stored as a reference to the parent,
+- list channels that only grew (e.g. `messages`) are stored as the new tail,
+- everything else is stored in full.
+
+Records are serialized with the checkpointer's binary serde and zlib-compressed.
+A full snapshot is written every `snapshot_every` checkpoints to bound the
+delta chain, and state is only rebuilt when a checkpoint is actually read.
+
+Usage:
+    memory = DeltaSqliteSaver("checkpoints.db")
+    graph = builder.compile(checkpointer=memory)
+"""
+
+import random
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+# Per-channel delta record kinds
+FULL, SAME, APPEND = "full", "same", "append"
+
+
+class DeltaSqliteSaver(BaseCheckpointSaver):
+    def __init__(self, path: str = "checkpoints.db", snapshot_every: int = 50,
+                 cache_size: int = 64, serde=None):
+        super().__init__(serde=serde)
+        self.snapshot_every = snapshot_every
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                depth INTEGER NOT NULL,
+                checkpoint BLOB,
+                channel_values BLOB,
+                metadata BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                task_path TEXT NOT NULL DEFAULT '',
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                value BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+        self.conn.commit()
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+    def _dumps(self, obj: Any) -> bytes:
+        type_, data = self.serde.dumps_typed(obj)
+        return type_.encode() + b"\0" + zlib.compress(data)
+
+    def _loads(self, blob: bytes) -> Any:
+        type_, data = blob.split(b"\0", 1)
+        return self.serde.loads_typed((type_.decode(), zlib.decompress(data)))
+
+    def _copy(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        # Serde round-trip: the cache must never share objects with a running graph,
+        # or an in-place mutation there would silently rewrite a cached parent
+        return self.serde.loads_typed(self.serde.dumps_typed(values))
+
+    # ------------------------------------------------------------------
+    # Delta encoding
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _is_prefix(old: list, new: list) -> bool:
+        if len(new) < len(old):
+            return False
+        return all(a is b or a == b for a, b in zip(old, new))
+
+    def _encode(self, values: Dict[str, Any], parent: Optional[Dict[str, Any]],
+                new_versions: ChannelVersions) -> Dict[str, tuple]:
+        record = {}
+        for channel, value in values.items():
+            if parent is None or channel not in parent:
+                record[channel] = (FULL, value)
+            elif channel not in new_versions:
+                record[channel] = (SAME,)
+            elif (isinstance(value, list) and isinstance(parent[channel], list)
+                  and self._is_prefix(parent[channel], value)):
+                base_len = len(parent[channel])
+                record[channel] = (APPEND, base_len, value[base_len:])
+            else:
+                record[channel] = (FULL, value)
+        return record
+
+    @staticmethod
+    def _apply(record: Dict[str, tuple], parent: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        values = {}
+        for channel, entry in record.items():
+            kind = entry[0]
+            if kind == FULL:
+                values[channel] = entry[1]
+            elif kind == SAME:
+                values[channel] = parent[channel]
+            else:
+                _, base_len, tail = entry
+                values[channel] = parent[channel][:base_len] + list(tail)
+        return values
+
+    # ------------------------------------------------------------------
+    # Lazy state reconstruction
+    # ------------------------------------------------------------------
+    def _remember(self, key: Tuple[str, str, str], values: Dict[str, Any]):
+        self._cache[key] = values
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _channel_values(self, thread_id: str, ns: str, checkpoint_id: str) -> Dict[str, Any]:
+        """Rebuild channel values by replaying deltas from the nearest snapshot or cached state."""
+        key = (thread_id, ns, checkpoint_id)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        chain = []
+        current = checkpoint_id
+        base = None
+        while current is not None:
+            cached = self._cache.get((thread_id, ns, current))
+            if cached is not None:
+                base = cached
+                break
+            row = self.conn.execute(
+                "SELECT parent_checkpoint_id, depth, channel_values FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, ns, current),
+            ).fetchone()
+            if row is None:
+                raise LookupError(
+                    f"Checkpoint {current!r} of thread {thread_id!r} is missing; "
+                    f"cannot rebuild state for {checkpoint_id!r}."
+                )
+            parent_id, depth, blob = row
+            chain.append((current, blob))
+            current = parent_id if depth > 0 else None
+
+        values = base
+        for cid, blob in reversed(chain):
+            values = self._apply(self._loads(blob), values)
+        self._remember(key, values)
+        return values
+
+    # ------------------------------------------------------------------
+    # BaseCheckpointSaver API
+    # ------------------------------------------------------------------
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        with self._lock:
+            if checkpoint_id:
+                row = self.conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._to_tuple(thread_id, ns, *row)
+
+    def _to_tuple(self, thread_id: str, ns: str, checkpoint_id: str,
+                  parent_id: Optional[str], checkpoint_blob: bytes,
+                  metadata_blob: bytes) -> CheckpointTuple:
+        checkpoint = self._loads(checkpoint_blob)
+        checkpoint["channel_values"] = self._copy(self._channel_values(thread_id, ns, checkpoint_id))
+
+        writes = self.conn.execute(
+            "SELECT task_id, channel, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint=checkpoint,
+            metadata=self._loads(metadata_blob),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns,
+                                  "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[(task_id, channel, self._loads(value))
+                            for task_id, channel, value in writes],
+        )
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None
+             ) -> Iterator[CheckpointTuple]:
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints"
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if "checkpoint_ns" in config["configurable"]:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before is not None:
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        yielded = 0
+        for thread_id, ns, checkpoint_id, parent_id, checkpoint_blob, metadata_blob in rows:
+            if limit is not None and yielded >= limit:
+                break
+            if filter:
+                metadata = self._loads(metadata_blob)
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            with self._lock:
+                item = self._to_tuple(thread_id, ns, checkpoint_id, parent_id,
+                                      checkpoint_blob, metadata_blob)
+            yield item
+            yielded += 1
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        values = checkpoint["channel_values"]
+        stripped = {k: v for k, v in checkpoint.items() if k != "channel_values"}
+
+        with self._lock:
+            depth = 0
+            parent_values = None
+            if parent_id:
+                row = self.conn.execute(
+                    "SELECT depth FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, ns, parent_id),
+                ).fetchone()
+                if row is not None and row[0] + 1 < self.snapshot_every:
+                    depth = row[0] + 1
+                    parent_values = self._channel_values(thread_id, ns, parent_id)
+
+            record = self._encode(values, parent_values, new_versions)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, ns, checkpoint["id"], parent_id, depth, self._dumps(stripped),
+                 self._dumps(record), self._dumps(dict(metadata))),
+            )
+            self.conn.commit()
+            self._remember((thread_id, ns, checkpoint["id"]), self._copy(values))
+
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]],
+                   task_id: str, task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special channels (errors, interrupts) overwrite; regular writes are kept once
+        verb = "REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "IGNORE"
+
+        with self._lock:
+            self.conn.executemany(
+                f"INSERT OR {verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (thread_id, ns, checkpoint_id, task_id, task_path,
+                     WRITES_IDX_MAP.get(channel, idx), channel, self._dumps(value))
+                    for idx, (channel, value) in enumerate(writes)
+                ],
+            )
+            self.conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self.conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self.conn.commit()
+            for key in [k for k in self._cache if k[0] == thread_id]:
+                del self._cache[key]
+
+    def get_next_version(self, current: Optional[str], channel: Any) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+    def prune(self, thread_id: str, keep_last: int = 20, checkpoint_ns: str = "") -> int:
+        """
+        Keep only the newest `keep_last` checkpoints of a thread.
+        Threads can fork (update_state, time travel), so every survivor whose
+        parent is removed is rewritten as a full snapshot; the rest of its
+        delta chain then ends there. Returns the number of checkpoints removed.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT checkpoint_id, parent_checkpoint_id, depth FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC",
+                (thread_id, checkpoint_ns),
+            ).fetchall()
+            if len(rows) <= keep_last:
+                return 0
+            survivors, doomed = rows[:keep_last], [r[0] for r in rows[keep_last:]]
+            doomed_set = set(doomed)
+
+            # Rebuild all snapshots before anything is deleted, since they replay through doomed rows
+            orphans = [(cid, depth) for cid, parent_id, depth in survivors if parent_id in doomed_set]
+            snapshots = {cid: self._channel_values(thread_id, checkpoint_ns, cid)
+                         for cid, depth in orphans if depth > 0}
+            for cid, depth in orphans:
+                if cid in snapshots:
+                    self.conn.execute(
+                        "UPDATE checkpoints SET depth = 0, parent_checkpoint_id = NULL, channel_values = ? "
+                        "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                        (self._dumps({ch: (FULL, v) for ch, v in snapshots[cid].items()}),
+                         thread_id, checkpoint_ns, cid),
+                    )
+                else:
+                    # Already a snapshot; only the dangling parent link goes
+                    self.conn.execute(
+                        "UPDATE checkpoints SET parent_checkpoint_id = NULL "
+                        "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                        (thread_id, checkpoint_ns, cid),
+                    )
+            self.conn.executemany(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, cid) for cid in doomed],
+            )
+            self.conn.executemany(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, cid) for cid in doomed],
+            )
+            self.conn.commit()
+            for cid in doomed:
+                self._cache.pop((thread_id, checkpoint_ns, cid), None)
+            return len(doomed)
+
+    # ------------------------------------------------------------------
+    # Async API (SQLite calls are short, so these delegate to the sync versions)
+    # ------------------------------------------------------------------
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None
+                    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]],
+                          task_id: str, task_path: str = "") -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
@@ -2,15 +2,16 @@ import streamlit as st
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from utils.retriever import MilvusRetriever
-from llm_selector import get_llm
+from llm_selector import get_router
 from utils.prompts import prompt
+from utils.tracing import tracer
 
 # ----------------------------
 # Initialize Components
 # ----------------------------
 @st.cache_resource
 def init_pipeline():
-    llm = get_llm(provider="groq")
+    llm = get_router(providers=["groq", "openai"])
     retriever = MilvusRetriever(
         collection_name="documents_chunks",
         model_name="sentence-transformers/all-MiniLM-L6-v2",
@@ -52,7 +53,8 @@ if user_input:
 
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
-            response = rag_chain.invoke({"input": user_input})
+            with tracer.request("rag_chain"):
+                response = rag_chain.invoke({"input": user_input})
             answer = response.get("answer", "I couldn’t find anything relevant.")
             st.markdown(answer)
 
@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+# Get the base directory path (one level up from this file)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Move up one directory to reach 'rag'
+BASE_DIR = os.path.dirname(BASE_DIR)
+
+# Add the base directory to the system path
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from llm_router import TokenBucket
+
+JUDGE_PROMPT = """You are grading an answer produced by a retrieval-augmented assistant.
+
+Question:
+{question}
+
+Retrieved context:
+{context}
+
+Answer:
+{answer}
+
+Score the answer on two axes from 0.0 to 1.0:
+- faithfulness: every claim in the answer is supported by the context.
+- relevance: the answer addresses the question.
+
+Reply with JSON only: {{"faithfulness": <float>, "relevance": <float>, "reason": "<one sentence>"}}"""
+
+
+def _content(response):
+    return response.content if hasattr(response, "content") else str(response)
+
+
+def _usage(response):
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+class JudgeParseError(ValueError):
+    """The judge reply held no usable verdict; the item is retried on the next run."""
+
+
+def parse_verdict(text):
+    """Pull the JSON verdict out of a judge reply, tolerating surrounding prose."""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    try:
+        verdict = json.loads(match.group(0)) if match else None
+        scores = {axis: float(verdict[axis]) for axis in ("faithfulness", "relevance")}
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise JudgeParseError(f"Unparseable judge reply: {text[:200]!r}")
+    # Catches judges answering on another scale (e.g. 1-5); also rejects NaN
+    if not all(0.0 <= v <= 1.0 for v in scores.values()):
+        raise JudgeParseError(f"Judge scores outside [0, 1]: {scores}")
+    return {**scores, "reason": verdict.get("reason", "")}
+
+
+class StubJudge:
+    """
+    Offline judge for tests: scores by token overlap instead of calling an LLM.
+    faithfulness = share of answer tokens found in the context,
+    relevance = share of question tokens found in the answer.
+    """
+    def __init__(self, latency_ms=0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000.0)
+        sections = re.split(r"\n(?:Question|Retrieved context|Answer):\n", prompt)
+        question, context, answer = (sections[1:4] + ["", "", ""])[:3]
+        tokens = lambda s: set(re.findall(r"\w+", s.lower()))
+        ans = tokens(answer.split("\n\nScore")[0])
+        faithfulness = len(ans & tokens(context)) / len(ans) if ans else 0.0
+        relevance = len(tokens(question) & ans) / len(tokens(question)) if tokens(question) else 0.0
+        return json.dumps({"faithfulness": round(faithfulness, 3),
+                           "relevance": round(relevance, 3), "reason": "stub"})
+
+
+class GenerationEvaluator:
+    """
+    Concurrent, resumable LLM-judge evaluation of a RAG chain.
+
+    Every finished item is appended to `checkpoint_file`, so a rerun skips what
+    is already done. Judge verdicts are cached in `cache_file` by a hash of
+    (question, context, answer). Chain and judge calls share a token bucket.
+    Items whose judge reply cannot be parsed are counted as errors, kept out of
+    the cache, checkpoint and score means, and retried on the next run.
+    """
+
+    def __init__(self, rag_chain, judge, checkpoint_file="./generation_checkpoint.jsonl",
+                 cache_file="./judge_cache.jsonl", max_concurrency=8, requests_per_second=2.0):
+        self.rag_chain = rag_chain
+        self.judge = judge
+        self.checkpoint_file = checkpoint_file
+        self.cache_file = cache_file
+        self.max_concurrency = max_concurrency
+        # Allow a burst of one request per worker
+        self.bucket = TokenBucket(requests_per_second, max(requests_per_second, max_concurrency))
+        self._io_lock = threading.Lock()
+        self.cache = self._load_jsonl(cache_file, key="key")
+        self.cache_hits = 0
+        self.errors = 0
+
+    # ------------------------------------------------------------
+    @staticmethod
+    def _load_jsonl(path, key):
+        records = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from an interrupted run
+                    records[record[key]] = record
+        return records
+
+    def _append(self, path, record):
+        with self._io_lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    @staticmethod
+    def item_id(question):
+        return hashlib.sha256(question.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def verdict_key(question, context, answer):
+        return hashlib.sha256("\0".join([question, context, answer]).encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------
+    def _judge(self, question, context, answer):
+        key = self.verdict_key(question, context, answer)
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self._io_lock:
+                self.cache_hits += 1
+            return cached["verdict"], 0.0, (0, 0), True
+
+        self.bucket.acquire()
+        start = time.perf_counter()
+        response = self.judge.invoke(JUDGE_PROMPT.format(question=question, context=context, answer=answer))
+        latency = time.perf_counter() - start
+        # Raises JudgeParseError before anything is cached
+        verdict = parse_verdict(_content(response))
+
+        record = {"key": key, "verdict": verdict}
+        with self._io_lock:
+            self.cache[key] = record
+        self._append(self.cache_file, record)
+        return verdict, latency, _usage(response), False
+
+    def _evaluate_item(self, question):
+        self.bucket.acquire()
+        usage = UsageMetadataCallbackHandler()
+        start = time.perf_counter()
+        response = self.rag_chain.invoke({"input": question}, config={"callbacks": [usage]})
+        generation_latency = time.perf_counter() - start
+
+        answer = response.get("answer", "")
+        context = "\n\n".join(getattr(doc, "page_content", str(doc)) for doc in response.get("context", []))
+        gen_in = sum(u.get("input_tokens", 0) for u in usage.usage_metadata.values())
+        gen_out = sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values())
+
+        verdict, judge_latency, (judge_in, judge_out), cached = self._judge(question, context, answer)
+        return {
+            "id": self.item_id(question),
+            "question": question,
+            "answer": answer,
+            "faithfulness": verdict["faithfulness"],
+            "relevance": verdict["relevance"],
+            "reason": verdict["reason"],
+            "generation_latency_s": generation_latency,
+            "judge_latency_s": judge_latency,
+            "judge_cached": cached,
+            "generation_tokens": {"input": gen_in, "output": gen_out},
+            "judge_tokens": {"input": judge_in, "output": judge_out},
+        }
+
+    # ------------------------------------------------------------
+    def evaluate(self, questions):
+        done = self._load_jsonl(self.checkpoint_file, key="id")
+        pending = [q for q in dict.fromkeys(questions) if self.item_id(q) not in done]
+        print(f"{len(done)} items already evaluated, {len(pending)} to go.")
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = {pool.submit(self._evaluate_item, q): q for q in pending}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.errors += 1
+                    print(f" Error evaluating '{futures[future]}': {e}")
+                    continue
+                self._append(self.checkpoint_file, result)
+                done[result["id"]] = result
+
+        results = [done[self.item_id(q)] for q in dict.fromkeys(questions) if self.item_id(q) in done]
+        return self.summarize(results)
+
+    def summarize(self, results):
+        def pct(values):
+            arr = np.asarray(values, dtype=float)
+            if not arr.size:
+                return {"p50": 0.0, "p95": 0.0, "mean": 0.0}
+            return {"p50": float(np.percentile(arr, 50)), "p95": float(np.percentile(arr, 95)),
+                    "mean": float(arr.mean())}
+
+        judged = [r for r in results if not r["judge_cached"]]
+        return {
+            "n_items": len(results),
+            "faithfulness": pct([r["faithfulness"] for r in results])["mean"],
+            "relevance": pct([r["relevance"] for r in results])["mean"],
+            "generation_latency_s": pct([r["generation_latency_s"] for r in results]),
+            "judge_latency_s": pct([r["judge_latency_s"] for r in judged]),
+            "tokens": {
+                "generation_input": sum(r["generation_tokens"]["input"] for r in results),
+                "generation_output": sum(r["generation_tokens"]["output"] for r in results),
+                "judge_input": sum(r["judge_tokens"]["input"] for r in results),
+                "judge_output": sum(r["judge_tokens"]["output"] for r in results),
+            },
+            "judge_cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "items": results,
+        }
+
+
+def evaluate_generation(ground_truth_file="./ground_truth.json", report_file="./generation_report.json",
+                        judge_provider="groq", max_concurrency=8, requests_per_second=2.0):
+    if not os.path.exists(ground_truth_file):
+        print("Ground truth file not found.")
+        return
+
+    from generation import build_rag_chain
+    from llm_selector import get_llm
+
+    with open(ground_truth_file, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+
+    evaluator = GenerationEvaluator(
+        build_rag_chain(),
+        get_llm(provider=judge_provider, temperature=0.0, max_tokens=200),
+        max_concurrency=max_concurrency,
+        requests_per_second=requests_per_second
+    )
+    report = evaluator.evaluate([item["query"] for item in dataset])
+
+    print(f"\nFaithfulness: {report['faithfulness']:.2f} | Relevance: {report['relevance']:.2f}")
+    print(f"Generation latency p50/p95: {report['generation_latency_s']['p50']:.2f}s / "
+          f"{report['generation_latency_s']['p95']:.2f}s")
+    print(f"Judge cache hits: {report['judge_cache_hits']}")
+    if report["errors"]:
+        print(f"{report['errors']} items failed (e.g. unparseable judge replies); rerun to retry them.")
+
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {report_file}")
+    return report
+
+
+if __name__ == "__main__":
+    evaluate_generation()
@@ -1,7 +1,9 @@
 import json
-# from utils.retriever import MilvusRetriever
 import os
 import sys
+import time
+
+import numpy as np
 
 # Get the base directory path (one level up from this file)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -13,39 +15,188 @@ BASE_DIR = os.path.dirname(BASE_DIR)
 if BASE_DIR not in sys.path:
     sys.path.append(BASE_DIR)
 
-# Now import your module
-from utils.retriever import MilvusRetriever
+_model = None
 
-print("import succes")
 
-from sentence_transformers import SentenceTransformer, util
+def get_model():
+    global _model
+    if _model is None:
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer("all-MiniLM-L6-v2")
+    return _model
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
 
-def precision_recall_at_k_semantic(retrieved, relevant, k=5, threshold=0.6):
-    retrieved_top_k = retrieved[:k]
-    
+def _texts(retrieved):
     # Handle both LangChain Documents and (text, score) tuples
-    if hasattr(retrieved_top_k[0], "page_content"):
-        retrieved_texts = [doc.page_content for doc in retrieved_top_k]
-    elif isinstance(retrieved_top_k[0], tuple):
-        retrieved_texts = [chunk for chunk, _ in retrieved_top_k]
-    else:
-        retrieved_texts = retrieved_top_k
-
-    relevant_embs = model.encode(relevant, convert_to_tensor=True)
-    retrieved_embs = model.encode(retrieved_texts, convert_to_tensor=True)
-    
-    cos_scores = util.cos_sim(retrieved_embs, relevant_embs)
-    hits = (cos_scores > threshold).any(dim=1).sum().item()
-    
-    precision = hits / k
-    recall = hits / len(relevant) if len(relevant) > 0 else 0
-    return precision, recall
-
-
-def evaluate_retrieval(ground_truth_file="./ground_truth.json", k=2):
-    print("entered")
+    if not retrieved:
+        return []
+    if hasattr(retrieved[0], "page_content"):
+        return [doc.page_content for doc in retrieved]
+    if isinstance(retrieved[0], tuple):
+        return [chunk for chunk, _ in retrieved]
+    return list(retrieved)
+
+
+def _pad(embeddings, counts, width):
+    """Scatter a flat (sum(counts), dim) matrix into (len(counts), width, dim) plus a validity mask."""
+    dim = embeddings.shape[1]
+    padded = np.zeros((len(counts), width, dim), dtype=np.float32)
+    mask = np.zeros((len(counts), width), dtype=bool)
+    offset = 0
+    for i, n in enumerate(counts):
+        n_kept = min(n, width)
+        padded[i, :n_kept] = embeddings[offset:offset + n_kept]
+        mask[i, :n_kept] = True
+        offset += n
+    return padded, mask
+
+
+# ----------------------------------------------------------------------
+# Vectorized metrics
+# ----------------------------------------------------------------------
+def compute_metrics(retrieved_embs, retrieved_mask, relevant_embs, relevant_mask, k_values, threshold=0.6):
+    """
+    Precision / recall / MRR / nDCG at every k in one pass.
+
+    retrieved_embs: (n_queries, max_k, dim), relevant_embs: (n_queries, max_rel, dim),
+    both L2-normalised and padded; masks mark the real rows.
+    A retrieved chunk is a hit when its cosine similarity to any relevant chunk exceeds `threshold`.
+    """
+    sims = np.einsum("qkd,qrd->qkr", retrieved_embs, relevant_embs)
+    match = (sims > threshold) & retrieved_mask[:, :, None] & relevant_mask[:, None, :]
+
+    hits = match.any(axis=2)                            # (q, K) retrieved rank i is a hit
+    covered = np.logical_or.accumulate(match, axis=1)   # (q, K, R) relevant r found within top-i
+    hits_cum = np.cumsum(hits, axis=1)
+    n_retrieved = retrieved_mask.sum(axis=1)
+    n_relevant = relevant_mask.sum(axis=1)
+
+    ranks = np.arange(1, hits.shape[1] + 1)
+    first_hit = np.where(hits.any(axis=1), hits.argmax(axis=1) + 1, 0)
+    # nDCG credits each relevant chunk once, at the first rank that covers it, so
+    # near-duplicate hits cannot push DCG past the ideal of min(n_relevant, k) gains
+    newly_covered = covered & ~np.concatenate([np.zeros_like(covered[:, :1]), covered[:, :-1]], axis=1)
+    gains = newly_covered.any(axis=2) / np.log2(ranks + 1)
+    dcg_cum = np.cumsum(gains, axis=1)
+    ideal_cum = np.cumsum(1.0 / np.log2(ranks + 1))
+
+    per_k = {}
+    for k in k_values:
+        idx = min(k, hits.shape[1]) - 1
+        # Divide by what actually came back, not k, when fewer than k results exist
+        denom = np.maximum(np.minimum(n_retrieved, k), 1)
+        precision = hits_cum[:, idx] / denom
+        recall = covered[:, idx].sum(axis=1) / np.maximum(n_relevant, 1)
+        mrr = np.where((first_hit > 0) & (first_hit <= k), 1.0 / np.maximum(first_hit, 1), 0.0)
+        n_ideal = np.clip(np.minimum(n_relevant, k), 1, len(ideal_cum))
+        ndcg = dcg_cum[:, idx] / ideal_cum[n_ideal - 1]
+        per_k[k] = {"precision": precision, "recall": recall, "mrr": mrr, "ndcg": ndcg}
+    return per_k
+
+
+def precision_recall_at_k_semantic(retrieved, relevant, k=5, threshold=0.6):
+    """Single-query precision/recall@k, kept for ad-hoc use."""
+    model = get_model()
+    retrieved_texts = _texts(retrieved[:k])
+    if not retrieved_texts or not relevant:
+        return 0.0, 0.0
+    ret = model.encode(retrieved_texts, convert_to_numpy=True, normalize_embeddings=True)[None]
+    rel = model.encode(relevant, convert_to_numpy=True, normalize_embeddings=True)[None]
+    m = compute_metrics(ret, np.ones(ret.shape[:2], bool), rel, np.ones(rel.shape[:2], bool), [k], threshold)[k]
+    return float(m["precision"][0]), float(m["recall"][0])
+
+
+# ----------------------------------------------------------------------
+# Evaluation engine
+# ----------------------------------------------------------------------
+class RetrievalEvaluator:
+    """
+    Batch evaluation over a labelled dataset:
+    embed every query and relevant chunk once, retrieve for all queries in one
+    batched search (or concurrently for retrievers without batch search), embed
+    all retrieved chunks once, then score every k in a single vectorized pass.
+    """
+
+    def __init__(self, retriever, k_values=(1, 3, 5, 10), threshold=0.6, batch_size=64, max_workers=8,
+                 model=None):
+        self.retriever = retriever
+        self.k_values = sorted(set(k_values))
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        # Anything with SentenceTransformer's encode / get_sentence_embedding_dimension
+        self.model = model or get_model()
+
+    def _encode(self, texts):
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True,
+                                 normalize_embeddings=True, show_progress_bar=False)
+
+    def _retrieve_all(self, queries):
+        max_k = self.k_values[-1]
+        if hasattr(self.retriever, "search_batch"):
+            query_embs = self._encode(queries)
+            results = []
+            for start in range(0, len(queries), self.batch_size):
+                results.extend(self.retriever.search_batch(query_embs[start:start + self.batch_size], limit=max_k))
+            return results
+        # Any LangChain retriever: the public batch API runs queries concurrently
+        return self.retriever.batch(list(queries), config={"max_concurrency": self.max_workers})
+
+    def evaluate(self, dataset):
+        timings = {}
+        queries = [item["query"] for item in dataset]
+        relevant = [[r.strip() for r in item["relevant_chunks"]] for item in dataset]
+        max_k = self.k_values[-1]
+
+        t0 = time.perf_counter()
+        retrieved = [_texts(docs)[:max_k] for docs in self._retrieve_all(queries)]
+        timings["retrieval_s"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        rel_counts = [len(r) for r in relevant]
+        ret_counts = [len(r) for r in retrieved]
+        rel_embs = self._encode([t for r in relevant for t in r])
+        ret_embs = self._encode([t for r in retrieved for t in r])
+        timings["embedding_s"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        rel_pad, rel_mask = _pad(rel_embs, rel_counts, max(rel_counts, default=1) or 1)
+        ret_pad, ret_mask = _pad(ret_embs, ret_counts, max_k)
+        per_k = compute_metrics(ret_pad, ret_mask, rel_pad, rel_mask, self.k_values, self.threshold)
+        timings["scoring_s"] = time.perf_counter() - t0
+
+        summary = {
+            f"@{k}": {name: float(values.mean()) if len(values) else 0.0 for name, values in metrics.items()}
+            for k, metrics in per_k.items()
+        }
+        per_query = [
+            {
+                "query": q,
+                "retrieved": ret_counts[i],
+                "metrics": {f"@{k}": {name: float(v[i]) for name, v in metrics.items()}
+                            for k, metrics in per_k.items()},
+            }
+            for i, q in enumerate(queries)
+        ]
+        return {
+            "n_queries": len(queries),
+            "k_values": self.k_values,
+            "threshold": self.threshold,
+            "summary": summary,
+            "timings": timings,
+            "per_query": per_query,
+        }
+
+
+def evaluate_retrieval(ground_truth_file="./ground_truth.json", k_values=(1, 3, 5, 10),
+                       report_file="./retrieval_report.json", threshold=0.6):
+    if not os.path.exists(ground_truth_file):
+        print("Ground truth file not found.")
+        return
+
+    from utils.retriever import MilvusRetriever
     retriever = MilvusRetriever(
         collection_name="documents_chunks",
         model_name="sentence-transformers/all-MiniLM-L6-v2",
@@ -53,32 +204,20 @@ def evaluate_retrieval(ground_truth_file="./ground_truth.json", k=2):
         milvus_port="19530"
     )
 
-    if not os.path.exists(ground_truth_file):
-        print("Ground truth file not found.")
-        return
-
     with open(ground_truth_file, "r", encoding="utf-8") as f:
         dataset = json.load(f)
 
-    total_precision, total_recall = 0, 0
-
-    for item in dataset:
-        query = item["query"]
-        relevant_chunks = [r.strip() for r in item["relevant_chunks"]]
-
-        retrieved = retriever._get_relevant_documents(query)
-
-        precision, recall = precision_recall_at_k_semantic(retrieved, relevant_chunks, k)
-        print(f"\n🔹 Query: {query}")
-        print(f"Precision@{k}: {precision:.2f}, Recall@{k}: {recall:.2f}")
+    report = RetrievalEvaluator(retriever, k_values=k_values, threshold=threshold).evaluate(dataset)
 
-        total_precision += precision
-        total_recall += recall
+    for k, metrics in report["summary"].items():
+        print(f"{k}: Precision {metrics['precision']:.2f} | Recall {metrics['recall']:.2f} | "
+              f"MRR {metrics['mrr']:.2f} | nDCG {metrics['ndcg']:.2f}")
 
-    n = len(dataset)
-    print("\nAverage Precision@{}: {:.2f}".format(k, total_precision / n))
-    print("Average Recall@{}: {:.2f}".format(k, total_recall / n))
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {report_file}")
+    return report
 
 
 if __name__ == "__main__":
-    evaluate_retrieval(k=3)
+    evaluate_retrieval(k_values=(1, 3, 5))
@@ -1,19 +1,27 @@
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from utils.retriever import MilvusRetriever
-from llm_selector import get_llm
 from utils.prompts import prompt
 
-llm = get_llm(provider="groq")
-retriever = MilvusRetriever(
-        collection_name="documents_chunks",
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        milvus_host="localhost",
-        milvus_port="19530"
-    )
 
-question_answer_chain = create_stuff_documents_chain(llm, prompt)
-rag_chain = create_retrieval_chain(retriever, question_answer_chain)
+def build_rag_chain(llm=None, retriever=None):
+    """Build the retrieval + answer chain; defaults to Groq and the Milvus retriever."""
+    if llm is None:
+        from llm_selector import get_llm
+        llm = get_llm(provider="groq")
+    if retriever is None:
+        from utils.retriever import MilvusRetriever
+        retriever = MilvusRetriever(
+            collection_name="documents_chunks",
+            model_name="sentence-transformers/all-MiniLM-L6-v2",
+            milvus_host="localhost",
+            milvus_port="19530"
+        )
 
-response = rag_chain.invoke({"input": "who is syed saleem.?"})
-print(response["answer"])
\ No newline at end of file
+    question_answer_chain = create_stuff_documents_chain(llm, prompt)
+    return create_retrieval_chain(retriever, question_answer_chain)
+
+
+if __name__ == "__main__":
+    rag_chain = build_rag_chain()
+    response = rag_chain.invoke({"input": "who is syed saleem.?"})
+    print(response["answer"])
@@ -0,0 +1,278 @@
+"""
+llm_router.py
+Latency-aware router over several LangChain LLMs.
+
+Every call goes to the fastest healthy provider. Providers are ranked by
+rolling latency and error rate, rate-limited with a token bucket and capped
+on in-flight requests. A second (hedged) request can be fired at the next
+provider when the first one is slower than its own p95.
+
+Any LangChain runnable can be routed, so the router is easy to exercise
+against local fake LLMs (e.g. `FakeListChatModel`, or an OpenAI-compatible
+server started locally and reached through `get_llm(..., base_url=...)`).
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig
+from utils.tracing import tracer
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until `tokens` are available or `timeout` seconds have passed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait_for = (tokens - self._tokens) / self.rate if self.rate > 0 else 0.05
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_for = min(wait_for, remaining)
+            time.sleep(wait_for)
+
+
+class ProviderStats:
+    """
+    Rolling latency / error window for a single provider.
+    Outcomes older than `error_ttl` seconds stop counting towards the error
+    rate, so a provider that was ejected gets probed again once they age out.
+    """
+
+    def __init__(self, window: int = 100, error_ttl: float = 60.0):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # (timestamp, ok)
+        self.error_ttl = error_ttl
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            if ok:
+                self.latencies.append(latency)
+            self.outcomes.append((time.monotonic(), ok))
+
+    def _recent(self) -> List[bool]:
+        cutoff = time.monotonic() - self.error_ttl
+        return [ok for ts, ok in self.outcomes if ts >= cutoff]
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        idx = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            recent = self._recent()
+        if not recent:
+            return 0.0
+        return 1.0 - sum(recent) / len(recent)
+
+    def recent_samples(self) -> int:
+        with self._lock:
+            return len(self._recent())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "error_rate": self.error_rate(),
+            "samples": len(self.outcomes),
+            "recent_samples": self.recent_samples(),
+        }
+
+
+class Provider:
+    """An LLM plus its rate limit, concurrency cap and rolling stats."""
+
+    def __init__(
+        self,
+        name: str,
+        llm: Runnable,
+        requests_per_second: float = 5.0,
+        burst: Optional[float] = None,
+        max_concurrency: int = 8,
+        window: int = 100,
+        error_ttl: float = 60.0,
+    ):
+        self.name = name
+        self.llm = llm
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.stats = ProviderStats(window, error_ttl)
+
+    def try_reserve(self) -> bool:
+        """Take a concurrency slot and a rate-limit token without blocking; False if either is unavailable."""
+        if not self.slots.acquire(blocking=False):
+            return False
+        if not self.bucket.try_acquire():
+            self.slots.release()
+            return False
+        return True
+
+    def call(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        """Invoke the underlying LLM, recording latency and outcome. Releases the slot taken by `try_reserve`."""
+        try:
+            with tracer.span("llm_call", provider=self.name):
+                start = time.perf_counter()
+                try:
+                    result = self.llm.invoke(input, config, **kwargs)
+                except Exception:
+                    self.stats.record(time.perf_counter() - start, ok=False)
+                    raise
+                self.stats.record(time.perf_counter() - start, ok=True)
+                return result
+        finally:
+            self.slots.release()
+
+
+class LLMRouter(Runnable):
+    """
+    Route each request to the fastest healthy provider, with optional hedging.
+
+    Usable anywhere a LangChain LLM is expected (`prompt | router`,
+    `create_stuff_documents_chain(router, prompt)`).
+    """
+
+    def __init__(
+        self,
+        providers: List[Provider],
+        hedge: bool = True,
+        hedge_after: Optional[float] = None,
+        min_hedge_delay: float = 0.05,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+        acquire_timeout: float = 10.0,
+        max_workers: int = 32,
+    ):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider.")
+        self.providers = providers
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.min_hedge_delay = min_hedge_delay
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.acquire_timeout = acquire_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-router")
+
+    # ----------------------------------------------------------------------
+    def ranked(self) -> List[Provider]:
+        """Healthy providers first (by p50 latency), unhealthy ones last."""
+        def key(p: Provider):
+            # A few failures are not enough evidence to eject a provider.
+            unhealthy = (p.stats.recent_samples() >= self.min_samples
+                         and p.stats.error_rate() > self.max_error_rate)
+            p50 = p.stats.percentile(0.50)
+            if p50 is None:
+                # Unexplored (or long-idle) providers sort first so they get probed;
+                # ones that have only failed recently sort after those with real latencies.
+                p50 = 0.0 if not p.stats.recent_samples() else float("inf")
+            return (unhealthy, p50)
+        return sorted(self.providers, key=key)
+
+    def _hedge_delay(self, provider: Provider) -> Optional[float]:
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        p95 = provider.stats.percentile(0.95)
+        return None if p95 is None else max(p95, self.min_hedge_delay)
+
+    def _acquire(self, candidates: List[Provider], block: bool = True) -> Optional[Provider]:
+        """
+        Reserve a slot and a token on the best provider that has both. Providers at
+        max_concurrency are skipped rather than queued on a router thread, where the
+        wait would count against the hedge timer and starve the other providers.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            for provider in candidates:
+                if provider.try_reserve():
+                    return provider
+            if not block or not candidates or time.monotonic() >= deadline:
+                return None
+            time.sleep(0.01)
+
+    # ----------------------------------------------------------------------
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        remaining = self.ranked()
+        pending = {}
+        errors = []
+
+        def launch(block: bool = True) -> bool:
+            provider = self._acquire(remaining, block)
+            if provider is None:
+                return False
+            remaining.remove(provider)
+            # Run in a copy of the caller's context so the llm_call span nests under it
+            ctx = contextvars.copy_context()
+            future = self._executor.submit(ctx.run, provider.call, input, config, **kwargs)
+            pending[future] = provider
+            return True
+
+        if not launch():
+            raise RuntimeError("All LLM providers are rate-limited or at capacity.")
+
+        while pending:
+            primary = next(iter(pending.values()))
+            timeout = self._hedge_delay(primary) if remaining and len(pending) == 1 else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Primary is slower than its p95: hedge at the next provider.
+                launch(block=False)
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    print(f"⚠️ LLM provider '{provider.name}' failed: {e}")
+                    errors.append((provider.name, e))
+
+            # Fail over if nothing else is still in flight.
+            if not pending and remaining:
+                launch()
+
+        raise RuntimeError(f"All LLM providers failed: {errors}")
+
+    # ----------------------------------------------------------------------
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider latency / error snapshot."""
+        return {p.name: p.stats.snapshot() for p in self.providers}
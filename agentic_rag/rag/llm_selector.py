@@ -4,6 +4,7 @@ Utility to select an LLM (OpenAI or Groq) in LangChain format.
 """
 
 import os
+from typing import Dict, Optional, Sequence
 from langchain_openai import OpenAI as LangOpenAI
 from langchain_groq import ChatGroq
 
@@ -11,21 +12,29 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-def get_llm(provider: str = "openai", temperature: float = 0.4, max_tokens: int = 500):
+def get_llm(provider: str = "openai", temperature: float = 0.4, max_tokens: int = 500,
+            base_url: Optional[str] = None):
     """
     Return an initialized LLM instance based on provider.
     Supported providers: 'openai', 'groq'
+    `base_url` points the client at a compatible local server (e.g. a fake LLM).
     """
 
     provider = provider.lower()
 
     if provider == "openai":
+        if base_url:
+            return LangOpenAI(temperature=temperature, max_tokens=max_tokens,
+                              base_url=base_url, api_key=os.getenv("OPENAI_API_KEY", "local"))
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("Missing OPENAI_API_KEY in environment.")
         return LangOpenAI(temperature=temperature, max_tokens=max_tokens)
 
     elif provider == "groq":
+        if base_url:
+            return ChatGroq(temperature=temperature, model_name="llama-3.1-8b-instant", max_tokens=max_tokens,
+                            base_url=base_url, api_key=os.getenv("GROQ_API_KEY", "local"))
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("Missing GROQ_API_KEY in environment.")
@@ -39,6 +48,32 @@ def get_llm(provider: str = "openai", temperature: float = 0.4, max_tokens: int
         raise ValueError(f"Unsupported provider: {provider}. Use 'openai' or 'groq'.")
 
 
+def get_router(providers: Sequence[str] = ("groq", "openai"), temperature: float = 0.4,
+               max_tokens: int = 500, limits: Optional[Dict[str, dict]] = None,
+               base_urls: Optional[Dict[str, str]] = None, **router_kwargs):
+    """
+    Return an LLMRouter over every provider in `providers` that is configured.
+    `limits` maps provider name -> Provider kwargs
+    (requests_per_second, burst, max_concurrency).
+    `base_urls` maps provider name -> base_url (see get_llm), e.g. to route to local fake LLM servers.
+    """
+    from llm_router import LLMRouter, Provider
+
+    limits = limits or {}
+    base_urls = base_urls or {}
+    routed = []
+    for name in providers:
+        try:
+            llm = get_llm(provider=name, temperature=temperature, max_tokens=max_tokens,
+                          base_url=base_urls.get(name))
+        except ValueError as e:
+            print(f"⚠️ Skipping LLM provider '{name}': {e}")
+            continue
+        routed.append(Provider(name, llm, **limits.get(name, {})))
+
+    return LLMRouter(routed, **router_kwargs)
+
+
 # ----------------------------------------------------------------------
 # 🧪 Example usage
 # ----------------------------------------------------------------------
@@ -46,3 +81,7 @@ def get_llm(provider: str = "openai", temperature: float = 0.4, max_tokens: int
 #     llm = get_llm(provider="groq")
 #     response = llm.invoke("What is Milvus and why is it used in RAG pipelines?")
 #     print("Response:\n", response.content)
+#
+#     router = get_router(providers=["groq", "openai"])
+#     response = router.invoke("What is Milvus and why is it used in RAG pipelines?")
+#     print(router.stats())
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+import numpy as np
+from utils.tracing import SIZE_BUCKETS, tracer
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of an encoder.
+    Queries arriving within `max_wait_ms` of each other (or until
+    `max_batch_size` is reached) are encoded together in one call, and each
+    caller gets its own vector back through a Future.
+    Batch sizes and queueing delays also go to the tracer as
+    `<name>_batch_size` and `<name>_queue_delay_seconds` histograms.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        metrics_window: int = 10000,
+        name: str = "embedding",
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Metrics
+        self.batch_sizes = Counter()
+        self.queue_delays = deque(maxlen=metrics_window)
+
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    # ----------------------------------------------------------------------
+    def submit(self, text: str) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed.")
+            self._queue.append((text, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def encode(self, text: str) -> np.ndarray:
+        """Blocking helper: embedding for a single text, shape (dim,)."""
+        return self.submit(text).result()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+
+    # ----------------------------------------------------------------------
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            # Wait out the window from the first arrival, unless the batch fills up
+            deadline = self._queue[0][2] + self.max_wait
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            texts = [text for text, _, _ in batch]
+            started = time.perf_counter()
+            delays = [started - enqueued for _, _, enqueued in batch]
+            self.batch_sizes[len(batch)] += 1
+            self.queue_delays.extend(delays)
+            tracer.observe(f"{self.name}_batch_size", len(batch), buckets=SIZE_BUCKETS)
+            for delay in delays:
+                tracer.observe(f"{self.name}_queue_delay_seconds", delay)
+            try:
+                vectors = self.encode_fn(texts)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    # ----------------------------------------------------------------------
+    def metrics(self) -> Dict[str, object]:
+        """Batch size distribution and queueing delay percentiles (ms)."""
+        delays = np.asarray(self.queue_delays) * 1000.0
+        total = sum(self.batch_sizes.values())
+        return {
+            "batches": total,
+            "batch_size_distribution": dict(sorted(self.batch_sizes.items())),
+            "mean_batch_size": (
+                sum(k * v for k, v in self.batch_sizes.items()) / total if total else 0.0
+            ),
+            "queue_delay_ms": {
+                "p50": float(np.percentile(delays, 50)) if delays.size else 0.0,
+                "p95": float(np.percentile(delays, 95)) if delays.size else 0.0,
+                "p99": float(np.percentile(delays, 99)) if delays.size else 0.0,
+            },
+        }
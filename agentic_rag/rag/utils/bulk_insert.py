@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import numpy as np
+from pymilvus import utility
+from utils.tracing import peak_rss_mb
+
+# gRPC caps messages at 64MB by default; stay well under it
+DEFAULT_MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+
+def batch_bounds(texts: Optional[List[str]], embeddings: np.ndarray, max_batch_bytes: int) -> List[tuple]:
+    """Split rows into (start, end) ranges whose estimated payload stays under max_batch_bytes."""
+    if texts is None:
+        # Vectors + int64 IDs only: fixed-size rows
+        rows_per_batch = max(max_batch_bytes // (embeddings.shape[1] * 4 + 8), 1)
+        return [(start, min(start + rows_per_batch, len(embeddings)))
+                for start in range(0, len(embeddings), rows_per_batch)]
+    row_bytes = embeddings.shape[1] * 4 + np.fromiter((len(t.encode("utf-8")) for t in texts),
+                                                      dtype=np.int64, count=len(texts))
+    bounds, start, size = [], 0, 0
+    for i, nbytes in enumerate(row_bytes):
+        if size + nbytes > max_batch_bytes and i > start:
+            bounds.append((start, i))
+            start, size = i, 0
+        size += nbytes
+    if start < len(texts):
+        bounds.append((start, len(texts)))
+    return bounds
+
+
+class MilvusBulkInserter:
+    """
+    Pipelined, size-capped inserts into a Milvus collection.
+    Vectors are sent as contiguous float32 slices of the embedding matrix
+    (no `.tolist()`), with at most `max_in_flight` insert RPCs outstanding.
+    """
+
+    def __init__(self, collection, max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES, max_in_flight: int = 4):
+        self.collection = collection
+        self.max_batch_bytes = max_batch_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="milvus-insert")
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._futures = []
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.batches = 0
+        self._start = None
+
+    def _send(self, column, field: str, vectors: np.ndarray):
+        try:
+            self.collection.insert([column, vectors], fields=[field, "embedding"])
+            with self._lock:
+                self.rows += len(vectors)
+                self.batches += 1
+        finally:
+            self._slots.release()
+
+    def insert(self, texts: Optional[List[str]], embeddings: np.ndarray, ids: Optional[np.ndarray] = None):
+        """
+        Queue rows for insertion; blocks only when max_in_flight batches are already pending.
+        With `ids`, rows are sent as (id, embedding) only and `texts` is ignored (text lives in the DocStore).
+        """
+        if self._start is None:
+            self._start = time.perf_counter()
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if ids is not None:
+            column, field, sized_by = np.asarray(ids, dtype=np.int64), "id", None
+        else:
+            column, field, sized_by = texts, "chunk_text", texts
+        for start, end in batch_bounds(sized_by, embeddings, self.max_batch_bytes):
+            self._slots.acquire()
+            future = self._executor.submit(self._send, column[start:end], field, embeddings[start:end])
+            with self._lock:
+                self._futures.append(future)
+
+    def flush(self) -> Dict[str, float]:
+        """Wait for all pending inserts, re-raise the first failure, and return ingestion stats."""
+        with self._lock:
+            futures, self._futures = self._futures, []
+        wait(futures)
+        for future in futures:
+            future.result()
+        return self.stats()
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = time.perf_counter() - self._start if self._start else 0.0
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "seconds": elapsed,
+            "rows_per_sec": self.rows / elapsed if elapsed else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+# --------------------------------------------------------------------
+# Bulk-import mode for very large loads
+# --------------------------------------------------------------------
+def write_bulk_import_files(texts: List[str], embeddings: np.ndarray, out_dir: str,
+                            rows_per_file: int = 100_000, ids: Optional[np.ndarray] = None) -> List[List[str]]:
+    """
+    Write columnar NumPy files in Milvus' bulk-import layout: one directory per
+    part, holding `chunk_text.npy` (or `id.npy` when `ids` are given) and
+    `embedding.npy`. Returns the local file groups; pass them through
+    `upload_bulk_import_files` before `start_bulk_import`.
+    """
+    groups = []
+    for part, start in enumerate(range(0, len(embeddings), rows_per_file)):
+        end = min(start + rows_per_file, len(embeddings))
+        groups.append(write_bulk_import_part(part, texts[start:end], embeddings[start:end], out_dir,
+                                             ids=None if ids is None else ids[start:end]))
+    print(f"Wrote {len(embeddings)} rows in {len(groups)} bulk-import parts under {out_dir}")
+    return groups
+
+
+def write_bulk_import_part(part: int, texts: List[str], embeddings: np.ndarray, out_dir: str,
+                           ids: Optional[np.ndarray] = None) -> List[str]:
+    """Write one bulk-import part directory and return its file group."""
+    part_dir = os.path.join(out_dir, f"part_{part:05d}")
+    os.makedirs(part_dir, exist_ok=True)
+    if ids is not None:
+        key_path = os.path.join(part_dir, "id.npy")
+        np.save(key_path, np.asarray(ids, dtype=np.int64))
+    else:
+        # Fixed-width UTF-32 array: memory is rows x longest chunk, so keep parts bounded
+        key_path = os.path.join(part_dir, "chunk_text.npy")
+        np.save(key_path, np.array(texts, dtype=np.str_))
+    vector_path = os.path.join(part_dir, "embedding.npy")
+    np.save(vector_path, np.ascontiguousarray(embeddings, dtype=np.float32))
+    return [key_path, vector_path]
+
+
+def upload_bulk_import_files(file_groups: List[List[str]], out_dir: str, prefix: str = "bulk_import",
+                             endpoint: str = "localhost:9000", bucket: str = "a-bucket",
+                             access_key: str = "minioadmin", secret_key: str = "minioadmin",
+                             secure: bool = False) -> List[List[str]]:
+    """
+    Upload local bulk-import parts to Milvus' MinIO bucket (defaults match docker-compose.yml
+    and Milvus' default bucket) and return the matching object keys for `start_bulk_import`.
+    Needs the optional `minio` package.
+    """
+    from minio import Minio
+
+    client = Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure)
+    remote_groups = []
+    for files in file_groups:
+        keys = []
+        for path in files:
+            key = "/".join([prefix, *os.path.relpath(path, out_dir).split(os.sep)])
+            client.fput_object(bucket, key, path)
+            keys.append(key)
+        remote_groups.append(keys)
+    print(f"Uploaded {len(remote_groups)} bulk-import parts to {bucket}/{prefix}")
+    return remote_groups
+
+
+def start_bulk_import(collection_name: str, file_groups: List[List[str]], timeout: float = 3600.0) -> List[int]:
+    """
+    Trigger server-side bulk import for each file group and wait for completion.
+    Paths must be object-storage keys visible to Milvus (see `upload_bulk_import_files`),
+    not local filesystem paths.
+    """
+    task_ids = [utility.do_bulk_insert(collection_name=collection_name, files=files) for files in file_groups]
+    deadline = time.monotonic() + timeout
+    pending = set(task_ids)
+    while pending and time.monotonic() < deadline:
+        for task_id in list(pending):
+            state = utility.get_bulk_insert_state(task_id=task_id)
+            if state.state_name == "Completed":
+                pending.discard(task_id)
+                print(f"Bulk import task {task_id} completed ({state.row_count} rows)")
+            elif state.state_name == "Failed":
+                raise RuntimeError(f"Bulk import task {task_id} failed: {state.failed_reason}")
+        if pending:
+            time.sleep(2)
+    if pending:
+        raise TimeoutError(f"Bulk import tasks still running: {sorted(pending)}")
+    return task_ids
@@ -0,0 +1,348 @@
+import bisect
+import fcntl
+import json
+import mmap
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+import numpy as np
+from utils.tracing import tracer
+
+# One fixed-size record per chunk; the chunk ID is the store's base ID plus the record's position
+INDEX_DTYPE = np.dtype([("offset", "<i8"), ("length", "<i4")])
+
+
+class DocStore:
+    """
+    Local chunk-text store keyed by chunk ID, so Milvus only holds vectors and IDs.
+
+    Text lives in an append-only UTF-8 blob that is memory-mapped for reads;
+    a fixed-width offset index maps ID -> (offset, length). IDs are assigned
+    here, sequentially from `base_id`, and passed to Milvus as explicit primary
+    keys. Recently read chunks are kept in an LRU hot cache.
+
+    A writer (`readonly=False`) repairs a torn tail on open; it must be the only
+    one, which VersionedDocStore guarantees with its root lock. Readers never
+    modify the files; they pick up records appended by the writer by
+    re-reading the index tail on an unknown ID.
+    """
+
+    def __init__(self, path: str, cache_size: int = 4096, readonly: bool = False, base_id: int = 0):
+        self.path = path
+        self.meta_path = os.path.join(path, "meta.json")
+        self.blob_path = os.path.join(path, "chunks.blob")
+        self.index_path = os.path.join(path, "chunks.idx")
+        self.readonly = readonly
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, str]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._index = np.zeros(1024, dtype=INDEX_DTYPE)
+        self._count = 0
+        self._blob_size = 0
+        self._blob = None
+        self._index_file = None
+        self._mmap = None
+        self._mapped_size = 0
+
+        if not readonly and not os.path.exists(self.meta_path):
+            # Written once, before any record, so readers never see IDs without their base
+            os.makedirs(path, exist_ok=True)
+            tmp = self.meta_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"base_id": int(base_id)}, f)
+            os.replace(tmp, self.meta_path)
+        with open(self.meta_path) as f:
+            self.base_id = int(json.load(f)["base_id"])
+
+        if readonly:
+            self._refresh()
+            return
+
+        # Drop a torn trailing record left by an interrupted append
+        index_bytes = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        with open(self.index_path, "ab") as f:
+            f.truncate(index_bytes // INDEX_DTYPE.itemsize * INDEX_DTYPE.itemsize)
+        self._refresh()
+        self._blob = open(self.blob_path, "a+b")
+        self._blob.truncate(self._blob_size)
+        self._index_file = open(self.index_path, "ab")
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def end_id(self) -> int:
+        """One past the highest ID stored so far."""
+        return self.base_id + self._count
+
+    def _refresh(self):
+        """Load index records appended since the last read (complete records only)."""
+        if not os.path.exists(self.index_path):
+            return
+        count = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+        if count <= self._count:
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._count * INDEX_DTYPE.itemsize)
+            records = np.fromfile(f, dtype=INDEX_DTYPE, count=count - self._count)
+        self._grow(count)
+        self._index[self._count:count] = records
+        self._count = count
+        last = records[-1]
+        self._blob_size = int(last["offset"] + last["length"])
+
+    def _grow(self, count: int):
+        if count > len(self._index):
+            grown = np.zeros(max(len(self._index) * 2, count), dtype=INDEX_DTYPE)
+            grown[:self._count] = self._index[:self._count]
+            self._index = grown
+
+    # ------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------
+    def append(self, texts: List[str]) -> np.ndarray:
+        """Append texts and return their new chunk IDs (int64)."""
+        if self.readonly:
+            raise RuntimeError("DocStore was opened read-only.")
+        encoded = [t.encode("utf-8") for t in texts]
+        if not encoded:
+            return np.zeros(0, dtype=np.int64)
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+
+        with self._lock:
+            records = np.empty(len(encoded), dtype=INDEX_DTYPE)
+            records["length"] = lengths
+            records["offset"] = self._blob_size + np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+            # Blob first, then index: a crash in between leaves unreferenced bytes, never a dangling ID
+            self._blob.write(b"".join(encoded))
+            self._blob.flush()
+            self._index_file.write(records.tobytes())
+            self._index_file.flush()
+
+            ids = np.arange(self.end_id, self.end_id + len(encoded), dtype=np.int64)
+            self._grow(self._count + len(encoded))
+            self._index[self._count:self._count + len(encoded)] = records
+            self._count += len(encoded)
+            self._blob_size += int(lengths.sum())
+        return ids
+
+    # ------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------
+    def _view(self):
+        # Remap lazily once appends have grown the blob past the current mapping
+        if self._mapped_size < self._blob_size:
+            if self._mmap is not None:
+                self._mmap.close()
+            if self._blob is None:
+                self._blob = open(self.blob_path, "rb")
+            self._mmap = mmap.mmap(self._blob.fileno(), self._blob_size, access=mmap.ACCESS_READ)
+            self._mapped_size = self._blob_size
+        return self._mmap
+
+    def get_many(self, ids: Iterable[int]) -> List[str]:
+        ids = [int(i) - self.base_id for i in ids]
+        found: Dict[int, str] = {}
+        with self._lock:
+            misses = []
+            for i in ids:
+                text = self._cache.get(i)
+                if text is None:
+                    misses.append(i)
+                else:
+                    self._cache.move_to_end(i)
+                    found[i] = text
+                tracer.cache_hit("doc_store", text is not None)
+
+            if misses:
+                if self.readonly and max(misses) >= self._count:
+                    # IDs written by another process since we last looked
+                    self._refresh()
+                if any(i < 0 or i >= self._count for i in misses):
+                    raise KeyError(f"Unknown chunk id in {[i + self.base_id for i in misses]}")
+                view = self._view() if self._blob_size else None
+                records = self._index[np.asarray(misses, dtype=np.int64)]
+                for i, (offset, length) in zip(misses, records.tolist()):
+                    text = view[offset:offset + length].decode("utf-8") if length else ""
+                    found[i] = text
+                    self._cache[i] = text
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return [found[i] for i in ids]
+
+    def get(self, chunk_id: int) -> str:
+        return self.get_many([chunk_id])[0]
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+            for f in (self._blob, self._index_file):
+                if f is not None:
+                    f.close()
+
+
+class VersionedDocStore:
+    """
+    One DocStore per Milvus collection version, under a shared root directory.
+
+    Each blue/green version gets its own `<root>/<collection>` store, so a
+    re-index writes a fresh copy and `drop()` deletes the copy of a version
+    that was garbage-collected: disk use follows the live versions instead of
+    growing by a full corpus on every rebuild. Stores take disjoint ID ranges
+    (each starts past every ID ever handed out under the root), so a reader can
+    route any hit ID to its store without knowing which version an alias
+    currently points at.
+
+    The writer (`readonly=False`) holds `<root>/writer.lock` for its lifetime;
+    only the newest store may be appended to. Readers discover new versions, and
+    forget dropped ones, by rescanning the root on an unknown ID.
+    """
+
+    def __init__(self, root: str, cache_size: int = 4096, readonly: bool = True):
+        self.root = root
+        self.cache_size = cache_size
+        self.readonly = readonly
+        self._lock = threading.RLock()
+        self._stores: Dict[str, DocStore] = {}
+        self._ordered: List[DocStore] = []
+        self._lock_file = None
+
+        if not readonly:
+            os.makedirs(root, exist_ok=True)
+            self._lock_file = open(os.path.join(root, "writer.lock"), "a")
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lock_file.close()
+                raise RuntimeError(f"Doc store root {root} already has a writer; open it with readonly=True.")
+        self._scan()
+
+    # ------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------
+    def open_writer(self, name: str) -> DocStore:
+        """Writable store for collection `name`, created past every ID already in use."""
+        if self.readonly:
+            raise RuntimeError("VersionedDocStore was opened read-only.")
+        with self._lock:
+            self._scan()
+            existing = self._stores.get(name)
+            if existing is not None:
+                if existing.end_id < self._next_id():
+                    raise RuntimeError(f"Store '{name}' is not the newest in {self.root}; appending to it "
+                                       "would reuse IDs of a later version. Re-index into a new version.")
+                self._stores.pop(name).close()
+            store = DocStore(os.path.join(self.root, name), self.cache_size, base_id=self._next_id())
+            self._stores[name] = store
+            self._order()
+        return store
+
+    def drop(self, name: str):
+        """Delete the store of a dropped collection version (no-op if it has none)."""
+        if self.readonly:
+            raise RuntimeError("VersionedDocStore was opened read-only.")
+        with self._lock:
+            self._scan()
+            store = self._stores.pop(name, None)
+            if store is None:
+                return
+            # Keep its range retired so a later store never reuses IDs a stale reader might route here
+            self._write_high_water(max(self._high_water(), store.end_id))
+            store.close()
+            self._order()
+            shutil.rmtree(store.path, ignore_errors=True)
+
+    def rename(self, name: str, new_name: str):
+        """Follow a collection rename (no-op if it has no store)."""
+        if self.readonly:
+            raise RuntimeError("VersionedDocStore was opened read-only.")
+        with self._lock:
+            self._scan()
+            store = self._stores.pop(name, None)
+            if store is None:
+                return
+            store.close()
+            os.rename(store.path, os.path.join(self.root, new_name))
+            self._scan()
+
+    def _next_id(self) -> int:
+        return max([self._high_water()] + [s.end_id for s in self._stores.values()])
+
+    def _high_water(self) -> int:
+        try:
+            with open(os.path.join(self.root, "next_id")) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_high_water(self, value: int):
+        path = os.path.join(self.root, "next_id")
+        with open(path + ".tmp", "w") as f:
+            f.write(str(value))
+        os.replace(path + ".tmp", path)
+
+    # ------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------
+    def _scan(self):
+        """Open stores created since the last scan and close those deleted."""
+        with self._lock:
+            names = set()
+            if os.path.isdir(self.root):
+                names = {n for n in os.listdir(self.root)
+                         if os.path.exists(os.path.join(self.root, n, "meta.json"))}
+            for name in set(self._stores) - names:
+                self._stores.pop(name).close()
+            for name in names - set(self._stores):
+                try:
+                    self._stores[name] = DocStore(os.path.join(self.root, name), self.cache_size,
+                                                  readonly=True)
+                except FileNotFoundError:
+                    continue  # removed while we were opening it
+            self._order()
+
+    def _order(self):
+        self._ordered = sorted(self._stores.values(), key=lambda s: s.base_id)
+
+    def _route(self, ids: List[int]) -> Dict[int, List[int]]:
+        bases = [s.base_id for s in self._ordered]
+        groups: Dict[int, List[int]] = {}
+        for i in ids:
+            pos = bisect.bisect_right(bases, i) - 1
+            if pos < 0:
+                raise KeyError(f"Unknown chunk id {i}")
+            groups.setdefault(pos, []).append(i)
+        return groups
+
+    def _get_many(self, ids: List[int]) -> List[str]:
+        found: Dict[int, str] = {}
+        for pos, group in self._route(ids).items():
+            found.update(zip(group, self._ordered[pos].get_many(group)))
+        return [found[i] for i in ids]
+
+    def get_many(self, ids: Iterable[int]) -> List[str]:
+        ids = [int(i) for i in ids]
+        with self._lock:
+            try:
+                return self._get_many(ids)
+            except KeyError:
+                # A version created (or dropped) since the last scan
+                self._scan()
+                return self._get_many(ids)
+
+    def get(self, chunk_id: int) -> str:
+        return self.get_many([chunk_id])[0]
+
+    def close(self):
+        with self._lock:
+            for store in self._stores.values():
+                store.close()
+            self._stores.clear()
+            self._ordered = []
+            if self._lock_file is not None:
+                self._lock_file.close()
@@ -1,11 +1,17 @@
 import os
+import time
 import numpy as np
 from typing import List, Dict
-from sentence_transformers import SentenceTransformer
 from pymilvus import (
     connections, FieldSchema, CollectionSchema, DataType, Collection, utility
 )
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.embedding_backends import get_embedding_backend
+from utils.doc_store import VersionedDocStore
+from utils.bulk_insert import (
+    DEFAULT_MAX_BATCH_BYTES, MilvusBulkInserter, start_bulk_import, upload_bulk_import_files,
+    write_bulk_import_part
+)
 
 class EmbeddingGenerator:
     def __init__(
@@ -14,20 +20,37 @@ class EmbeddingGenerator:
         input_dir="../data/chunks",
         milvus_host="localhost",
         milvus_port="19530",
-        collection_name="documents_chunks"
+        collection_name="documents_chunks",
+        create_collection=True,
+        max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+        max_inserts_in_flight=4,
+        embedding_backend="torch",
+        doc_store_dir=None
     ):
         # Model setup
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
+        self.model = get_embedding_backend(embedding_backend, model_name)
         self.input_dir = input_dir
 
+        # Insert pipeline
+        self.max_batch_bytes = max_batch_bytes
+        self.max_inserts_in_flight = max_inserts_in_flight
+        self._inserter = None
+
+        # With a doc store, chunk text stays local and Milvus keeps only IDs + vectors.
+        # Each collection version gets its own store under doc_store_dir; doc_store is the current one.
+        self.doc_stores = VersionedDocStore(doc_store_dir, readonly=False) if doc_store_dir else None
+        self.doc_store = None
+
         # Milvus setup
         self.collection_name = collection_name
         connections.connect("default", host=milvus_host, port=milvus_port)
         print(f"Connected to Milvus at {milvus_host}:{milvus_port}")
 
-        # Create collection if not exists
-        self._create_collection_if_not_exists()
+        # Create collection if not exists (blue/green re-indexing creates its own)
+        self.collection = None
+        if create_collection:
+            self._create_collection_if_not_exists()
 
     # ----------------------------------------------------------------
     def _create_collection_if_not_exists(self):
@@ -35,17 +58,39 @@ class EmbeddingGenerator:
         if utility.has_collection(self.collection_name):
             print(f"Using existing collection: {self.collection_name}")
             self.collection = Collection(self.collection_name)
+            has_text = any(f.name == "chunk_text" for f in self.collection.schema.fields)
+            if self.doc_stores is not None and has_text:
+                raise ValueError(
+                    f"Collection '{self.collection_name}' stores chunk_text; "
+                    "rebuild it with reindex_blue_green(allow_schema_change=True) to move text into the doc store."
+                )
+            if self.doc_stores is not None:
+                # collection_name may be an alias; the store belongs to the collection behind it
+                name = self.collection.describe().get("collection_name", self.collection_name)
+                self.doc_store = self.doc_stores.open_writer(name)
             return
 
-        fields = [
-            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-            FieldSchema(name="chunk_text", dtype=DataType.VARCHAR, max_length=2000),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=384)
-        ]
+        self.collection = self._create_collection(self.collection_name)
+
+    def _create_collection(self, name):
+        if self.doc_stores is not None:
+            # IDs come from this version's doc store, text is hydrated from it after search
+            self.doc_store = self.doc_stores.open_writer(name)
+            fields = [
+                FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
+                FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=384)
+            ]
+        else:
+            fields = [
+                FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+                FieldSchema(name="chunk_text", dtype=DataType.VARCHAR, max_length=2000),
+                FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=384)
+            ]
         schema = CollectionSchema(fields, description="Document chunks with embeddings")
 
-        self.collection = Collection(name=self.collection_name, schema=schema)
-        print(f"Created Milvus collection: {self.collection_name}")
+        collection = Collection(name=name, schema=schema)
+        print(f"Created Milvus collection: {name}")
+        return collection
 
     # ----------------------------------------------------------------
     def read_chunks(self) -> Dict[str, List[str]]:
@@ -71,16 +116,18 @@ class EmbeddingGenerator:
 
     # ----------------------------------------------------------------
     def store_in_milvus(self, texts: List[str], embeddings: np.ndarray):
-        """Insert text and embedding pairs into Milvus"""
-        data = [
-            texts,                # for chunk_text
-            embeddings.tolist()   # for embedding
-        ]
-        self.collection.insert(
-            data,
-            fields=["chunk_text", "embedding"]  # Explicit field mapping
-        )
-        print(f"Inserted {len(texts)} records into Milvus collection '{self.collection_name}'")
+        """Insert text and embedding pairs into Milvus in size-capped, pipelined batches"""
+        # Text goes to the doc store first so every ID Milvus sees can be hydrated
+        ids = self.doc_store.append(texts) if self.doc_store is not None else None
+        if self._inserter is not None:
+            self._inserter.insert(texts, embeddings, ids=ids)
+            return
+
+        inserter = MilvusBulkInserter(self.collection, self.max_batch_bytes, self.max_inserts_in_flight)
+        inserter.insert(texts, embeddings, ids=ids)
+        inserter.flush()
+        inserter.close()
+        print(f"Inserted {len(texts)} records into Milvus collection '{self.collection.name}'")
 
 
     def process_file(self,filename, chunks):
@@ -90,36 +137,38 @@ class EmbeddingGenerator:
             return filename
             
     # ----------------------------------------------------------------
-    def process_all_files(self):
-        """Read chunks, embed them, and store in Milvus"""
-        chunks_dict = self.read_chunks()
-
-        
-        #     return filename
+    def _insert_all(self, chunks_dict):
+        # One shared pipeline so inserts overlap with embedding of the next files
+        self._inserter = MilvusBulkInserter(self.collection, self.max_batch_bytes, self.max_inserts_in_flight)
+        failed = {}
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:  
+                futures = {
+                    executor.submit(self.process_file, filename, chunks): filename
+                    for filename, chunks in chunks_dict.items()
+                }
+                
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                        print(f"Completed: {result}")
+                    except Exception as e:
+                        failed[futures[future]] = str(e)
+                        print(f" Error processing file {futures[future]}: {e}")
 
+            stats = self._inserter.flush()
+        finally:
+            self._inserter.close()
+            self._inserter = None
 
-        # for filename, chunks in chunks_dict.items():
-        #     print(f"\nProcessing file: {filename} ({len(chunks)} chunks)")
-        #     embeddings = self.generate_embeddings(chunks)
-        #     self.store_in_milvus(chunks, embeddings)
+        print(f"Inserted {stats['rows']} rows in {stats['batches']} batches: "
+              f"{stats['rows_per_sec']:.0f} rows/sec, peak RSS {stats['peak_rss_mb']:.0f} MB")
+        stats["failed_files"] = failed
+        if failed:
+            print(f"⚠️ {len(failed)} file(s) failed to ingest: {sorted(failed)}")
+        return stats
 
-        with ThreadPoolExecutor(max_workers=4) as executor:  
-            futures = [
-                executor.submit(self.process_file, filename, chunks)
-                for filename, chunks in chunks_dict.items()
-            ]
-            
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    print(f"Completed: {result}")
-                except Exception as e:
-                    print(f" Error processing file: {e}")
-
-
-        print("\nAll embeddings stored in Milvus successfully!")
-
-        # Build and load index after insertion
+    def _build_index(self):
         print("\nCreating index after data insertion...")
         index_params = {
             "metric_type": "COSINE",
@@ -127,11 +176,186 @@ class EmbeddingGenerator:
             "params": {"nlist": 128}
         }
         self.collection.create_index(field_name="embedding", index_params=index_params)
+        utility.wait_for_index_building_complete(self.collection.name)
         print("Index created successfully!")
 
+    # ----------------------------------------------------------------
+    def process_all_files(self):
+        """Read chunks, embed them, and store in Milvus"""
+        chunks_dict = self.read_chunks()
+
+        self._insert_all(chunks_dict)
+
+        print("\nAll embeddings stored in Milvus successfully!")
+
+        # Build and load index after insertion
+        self._build_index()
+
         self.collection.load()
         print("Collection loaded and ready for search.")
 
+    # ----------------------------------------------------------------
+    def export_bulk_import(self, out_dir, rows_per_file=100_000, import_now=False, **upload_kwargs):
+        """
+        Embed every chunk and write columnar bulk-import files instead of inserting.
+        Chunks are embedded and written one part (`rows_per_file` rows) at a time, so
+        peak memory is bounded by the part size rather than the corpus.
+        With `import_now`, upload the parts to Milvus' MinIO bucket (`upload_kwargs` go to
+        upload_bulk_import_files) and trigger Milvus bulk import on the uploaded keys.
+        """
+        chunks_dict = self.read_chunks()
+        texts = [chunk for chunks in chunks_dict.values() for chunk in chunks]
+        groups = []
+        for part, start in enumerate(range(0, len(texts), rows_per_file)):
+            part_texts = texts[start:start + rows_per_file]
+            embeddings = self.generate_embeddings(part_texts)
+            ids = self.doc_store.append(part_texts) if self.doc_store is not None else None
+            groups.append(write_bulk_import_part(part, part_texts, embeddings, out_dir, ids=ids))
+            print(f"Wrote bulk-import part {part} ({len(part_texts)} rows)")
+        if import_now:
+            start_bulk_import(self.collection.name, upload_bulk_import_files(groups, out_dir, **upload_kwargs))
+        return groups
+
+    # ----------------------------------------------------------------
+    # Blue/green re-indexing
+    # ----------------------------------------------------------------
+    def _versions(self, alias):
+        """Versioned collections built for this alias, oldest first."""
+        prefix = f"{alias}_v"
+        return sorted(
+            (name for name in utility.list_collections()
+             if name.startswith(prefix) and name[len(prefix):].isdigit()),
+            key=lambda name: int(name[len(prefix):])
+        )
+
+    def _check_schema_change(self, alias, allow_schema_change):
+        """Refuse to point `alias` at a different text layout than the one it serves now."""
+        if not (alias in utility.list_collections() or self._alias_exists(alias)):
+            return
+        live_has_text = any(f.name == "chunk_text" for f in Collection(alias).schema.fields)
+        new_has_text = self.doc_stores is None
+        if live_has_text == new_has_text:
+            return
+        layouts = {True: "chunk_text in Milvus", False: "doc store"}
+        message = (f"'{alias}' serves {layouts[live_has_text]} but this rebuild uses {layouts[new_has_text]}; "
+                   "running retrievers would fail until restarted with the matching doc_store_dir.")
+        if not allow_schema_change:
+            raise ValueError(message + " Pass allow_schema_change=True to switch anyway.")
+        print(f"⚠️ {message}")
+
+    @staticmethod
+    def _alias_exists(alias):
+        return any(alias in utility.list_aliases(name) for name in utility.list_collections())
+
+    @staticmethod
+    def default_smoke_queries(chunks_dict, n=5):
+        """Opening text of a few ingested chunks; each should retrieve at least itself."""
+        chunks = [chunk for chunks in chunks_dict.values() for chunk in chunks if chunk.strip()]
+        step = max(len(chunks) // n, 1)
+        return [chunk[:200] for chunk in chunks[::step][:n]]
+
+    def smoke_test(self, collection, queries, min_results=1):
+        """Run each smoke query against `collection`; True if every query returns enough hits."""
+        embeddings = self.model.encode(queries, convert_to_numpy=True)
+        results = collection.search(
+            data=embeddings,
+            anns_field="embedding",
+            param={"metric_type": "COSINE", "params": {"nprobe": 10}},
+            limit=max(min_results, 1),
+            output_fields=[] if self.doc_stores is not None else ["chunk_text"]
+        )
+        for query, hits in zip(queries, results):
+            if self.doc_stores is not None:
+                texts = self.doc_store.get_many([hit.id for hit in hits])
+            else:
+                texts = [hit.entity.get("chunk_text") for hit in hits]
+            if len(texts) < min_results or not all(texts):
+                print(f" Smoke query failed: {query!r} returned {len(texts)} results")
+                return False
+        return True
+
+    def reindex_blue_green(self, alias=None, smoke_queries=None, min_results=1, keep_versions=1,
+                           allow_schema_change=False):
+        """
+        Rebuild into a fresh versioned collection and switch `alias` to it.
+
+        The live collection keeps serving untouched while the new version is
+        inserted, indexed and loaded. The alias only moves once every file
+        ingested, the entity count matches the chunks read, and the smoke
+        queries pass (by default, a sample of the ingested chunks themselves);
+        then all but the newest `keep_versions` old versions are dropped
+        (kept ones allow a quick rollback via alter_alias), together with
+        their doc stores.
+
+        One-time migration caveat: if `alias` is still a physical collection,
+        it is renamed to `<alias>_v0` and the alias is created right after.
+        Between those two calls the name resolves to nothing, so searches in
+        that window fail. Run the first migration at a quiet time; every
+        later switch is a single atomic alter_alias.
+
+        Running retrievers pick chunk_text vs the doc store once, at startup, so
+        moving the alias between the two layouts breaks them until restarted.
+        That switch is refused unless `allow_schema_change` is set.
+        """
+        alias = alias or self.collection_name
+        self._check_schema_change(alias, allow_schema_change)
+        version = f"{alias}_v{int(time.time() * 1000)}"
+        chunks_dict = self.read_chunks()
+        expected = sum(len(chunks) for chunks in chunks_dict.values())
+        if smoke_queries is None:
+            smoke_queries = self.default_smoke_queries(chunks_dict)
+        self.collection = self._create_collection(version)
+
+        try:
+            stats = self._insert_all(chunks_dict)
+            if stats["failed_files"]:
+                raise RuntimeError(f"{len(stats['failed_files'])} file(s) failed to ingest into {version}: "
+                                   f"{stats['failed_files']}; alias '{alias}' left unchanged.")
+            self.collection.flush()
+            if self.collection.num_entities != expected:
+                raise RuntimeError(f"{version} holds {self.collection.num_entities} entities but "
+                                   f"{expected} chunks were read; alias '{alias}' left unchanged.")
+            self._build_index()
+            self.collection.load()
+            utility.wait_for_loading_complete(version)
+            print(f"Collection {version} loaded ({self.collection.num_entities} entities).")
+
+            if not smoke_queries or not self.smoke_test(self.collection, smoke_queries, min_results):
+                raise RuntimeError(f"Smoke test failed for {version}; alias '{alias}' left unchanged.")
+        except Exception:
+            self.collection.release()
+            utility.drop_collection(version)
+            if self.doc_stores is not None:
+                self.doc_stores.drop(version)
+            raise
+
+        # Atomic switch
+        if alias in utility.list_collections():
+            # One-time migration: the alias name is still a physical collection. Rename it
+            # into the version series (keeping it as the rollback target) instead of dropping it.
+            legacy = f"{alias}_v0"
+            print(f"⚠️ Renaming physical collection '{alias}' to '{legacy}' so '{alias}' can become an alias; "
+                  f"searches on '{alias}' fail until the alias is created.")
+            utility.rename_collection(alias, legacy)
+            if self.doc_stores is not None:
+                self.doc_stores.rename(alias, legacy)
+        if self._alias_exists(alias):
+            utility.alter_alias(collection_name=version, alias=alias)
+        else:
+            utility.create_alias(collection_name=version, alias=alias)
+        print(f"Alias '{alias}' now points to {version}")
+
+        # Garbage-collect old versions
+        old = [name for name in self._versions(alias) if name != version]
+        for name in old[:max(len(old) - keep_versions, 0)]:
+            Collection(name).release()
+            utility.drop_collection(name)
+            if self.doc_stores is not None:
+                self.doc_stores.drop(name)
+            print(f"Dropped old collection {name}")
+
+        return version
+
 # --------------------------------------------------------------------
 # Run directly
 # --------------------------------------------------------------------
@@ -145,3 +369,8 @@ class EmbeddingGenerator:
 #     )
 
 #     embedder.process_all_files()
+#
+#     # Zero-downtime rebuild behind the "documents_chunks" alias
+#     embedder = EmbeddingGenerator(create_collection=False)
+#     embedder.reindex_blue_green(alias="documents_chunks",
+#                                 smoke_queries=["What is Docling?", "Who is Syed Saleem?"])
@@ -0,0 +1,152 @@
+"""
+Selectable sentence-embedding backends.
+
+- "torch":     SentenceTransformer on PyTorch (the original behaviour).
+- "onnx":      the same model exported to ONNX, run with onnxruntime + tokenizers.
+- "onnx-int8": the ONNX model with int8 dynamic quantization.
+
+The ONNX backends do not import torch at serving time, which cuts startup
+time and memory on CPU-only boxes. Export is an explicit one-off step that
+does need torch and `optimum[onnxruntime]`:
+
+    python utils/embedding_backends.py --model sentence-transformers/all-MiniLM-L6-v2
+
+Requesting an ONNX backend whose model files are missing raises instead of
+exporting on the fly.
+
+Every backend exposes `encode(texts, batch_size=32, **kwargs) -> np.ndarray`
+returning L2-normalised float32 vectors, so it is a drop-in for the
+`SentenceTransformer.encode` calls in EmbeddingGenerator and MilvusRetriever.
+"""
+
+import os
+from typing import List
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODELS_DIR = os.path.join(PROJECT_DIR, "models")
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                                 normalize_embeddings=True, show_progress_bar=show_progress_bar)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+
+class OnnxBackend:
+    def __init__(self, model_dir: str, quantized: bool = False, num_threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        model_file = os.path.join(model_dir, "model_int8.onnx" if quantized else "model.onnx")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer.encode_batch(list(texts[start:start + batch_size]))
+            input_ids = np.asarray([e.ids for e in encoded], dtype=np.int64)
+            attention_mask = np.asarray([e.attention_mask for e in encoded], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            token_embeddings = self.session.run(None, feeds)[0]
+            # Mean pooling over real tokens, then L2 normalisation (matches the ST pipeline)
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            outputs.append(pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12))
+        if not outputs:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.vstack(outputs).astype(np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.session.get_outputs()[0].shape[-1]
+
+
+# --------------------------------------------------------------------
+def default_model_dir(model_name: str) -> str:
+    return os.path.join(MODELS_DIR, model_name.split("/")[-1] + "-onnx")
+
+
+def export_onnx(model_name: str, model_dir: str, quantize: bool = True):
+    """One-off export of `model_name` to ONNX (plus an int8 dynamically quantized copy)."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+
+    print(f"Exporting {model_name} to ONNX at {model_dir} ...")
+    ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(model_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(os.path.join(model_dir, "model.onnx"),
+                         os.path.join(model_dir, "model_int8.onnx"),
+                         weight_type=QuantType.QInt8)
+        print("Wrote int8 dynamically quantized model.")
+
+
+def get_embedding_backend(backend: str = "torch",
+                          model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                          model_dir: str = None):
+    backend = backend.lower()
+    if backend == "torch":
+        return TorchBackend(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        model_dir = model_dir or default_model_dir(model_name)
+        quantized = backend == "onnx-int8"
+        needed = "model_int8.onnx" if quantized else "model.onnx"
+        if not os.path.exists(os.path.join(model_dir, needed)):
+            raise FileNotFoundError(
+                f"No {needed} in {model_dir}. Export it first (needs torch + optimum): "
+                f"python utils/embedding_backends.py --model {model_name} --model-dir {model_dir}"
+            )
+        return OnnxBackend(model_dir, quantized=quantized)
+    raise ValueError(f"Unsupported embedding backend: {backend}. Use 'torch', 'onnx' or 'onnx-int8'.")
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Row-wise cosine between two backends' (normalised) outputs for the same texts."""
+    cos = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    return {"min": float(cos.min()), "mean": float(cos.mean()), "p01": float(np.percentile(cos, 1))}
+
+
+# --------------------------------------------------------------------
+# Export CLI
+# --------------------------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a sentence-transformers model to ONNX (+ int8).")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--model-dir", help="Defaults to models/<model>-onnx in the project root")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 copy")
+    args = parser.parse_args()
+
+    export_onnx(args.model, args.model_dir or default_model_dir(args.model), quantize=not args.no_quantize)
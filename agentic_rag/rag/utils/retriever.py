@@ -1,9 +1,14 @@
+import asyncio
+import contextvars
 import numpy as np
-from typing import List, Optional
-from sentence_transformers import SentenceTransformer
+from typing import Any, List, Optional
 from pymilvus import connections, Collection
 from langchain.schema import Document
 from langchain.schema.retriever import BaseRetriever
+from utils.batching import MicroBatcher
+from utils.doc_store import VersionedDocStore
+from utils.embedding_backends import get_embedding_backend
+from utils.tracing import tracer
 
 
 class MilvusRetriever(BaseRetriever):
@@ -12,15 +17,24 @@ class MilvusRetriever(BaseRetriever):
     Retrieves top-k relevant chunks as LangChain Document objects.
     """
 
-    collection_name: str
+    collection_name: str  # may be an alias; Milvus resolves it on every search
     model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
     milvus_host: str = "localhost"
     milvus_port: str = "19530"
     top_k: int = 3
+    # "torch", "onnx" or "onnx-int8" (see utils/embedding_backends.py)
+    embedding_backend: str = "torch"
+    # Micro-batching of concurrent query embeddings (0 disables it)
+    batch_window_ms: float = 0.0
+    max_batch_size: int = 32
+    # Hydrate chunk text from a local DocStore instead of Milvus' chunk_text field
+    doc_store_dir: Optional[str] = None
 
     # Internal (non-pydantic) fields
     _collection: Optional[Collection] = None
-    _model: Optional[SentenceTransformer] = None
+    _model: Optional[Any] = None
+    _batcher: Optional[MicroBatcher] = None
+    _doc_store: Optional[VersionedDocStore] = None
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -33,39 +47,97 @@ class MilvusRetriever(BaseRetriever):
         self._collection = Collection(self.collection_name)
         self._collection.load()
 
+        # The collection's schema decides where chunk text lives; refuse a mismatched doc_store_dir.
+        # This is decided once: reindex_blue_green refuses to move the alias to the other layout.
+        has_text = any(f.name == "chunk_text" for f in self._collection.schema.fields)
+        if self.doc_store_dir and has_text:
+            raise ValueError(f"Collection '{self.collection_name}' stores chunk_text; its auto IDs do not "
+                             "index the doc store. Drop doc_store_dir or reindex with a doc store.")
+        if not self.doc_store_dir and not has_text:
+            raise ValueError(f"Collection '{self.collection_name}' has no chunk_text field; "
+                             "set doc_store_dir to hydrate text from the doc store.")
+        if self.doc_store_dir:
+            # Read-only: the ingesting process owns the files; new versions are picked up on demand
+            self._doc_store = VersionedDocStore(self.doc_store_dir)
+
         # Load embedding model
-        self._model = SentenceTransformer(self.model_name)
+        self._model = get_embedding_backend(self.embedding_backend, self.model_name)
+        if self.batch_window_ms > 0:
+            self._batcher = MicroBatcher(
+                lambda texts: self._model.encode(texts),
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.batch_window_ms
+            )
         print(f"✅ Connected to Milvus collection: {self.collection_name}")
 
     # ----------------------------------------------------------------------
     def embed_query(self, query: str) -> np.ndarray:
         """Convert query text into embedding vector."""
+        if self._batcher is not None:
+            return self._batcher.encode(query)[np.newaxis, :]
         return self._model.encode([query])
 
+    # ----------------------------------------------------------------------
+    def _output_fields(self) -> List[str]:
+        return [] if self._doc_store is not None else ["chunk_text"]
+
+    def _to_documents(self, hits) -> List[Document]:
+        if self._doc_store is not None:
+            with tracer.span("doc_store_hydrate", n=len(hits)):
+                texts = self._doc_store.get_many([hit.id for hit in hits])
+        else:
+            texts = [hit.entity.get("chunk_text") for hit in hits]
+        return [Document(page_content=text, metadata={"score": 1 - hit.distance})
+                for text, hit in zip(texts, hits)]
+
     # ----------------------------------------------------------------------
     def _get_relevant_documents(self, query: str) -> List[Document]:
         """LangChain-compatible retrieval method."""
-        query_embedding = self.embed_query(query)
+        with tracer.span("embed_query"):
+            query_embedding = self.embed_query(query)
         search_params = {"metric_type": "COSINE", "params": {"nprobe": 10}}
 
-        results = self._collection.search(
-            data=query_embedding,
-            anns_field="embedding",
-            param=search_params,
-            limit=self.top_k,
-            output_fields=["chunk_text"]
-        )
-
-        documents = []
-        for hit in results[0]:
-            chunk_text = hit.entity.get("chunk_text")
-            score = 1 - hit.distance
-            documents.append(Document(page_content=chunk_text, metadata={"score": score}))
+        with tracer.span("milvus_search", top_k=self.top_k):
+            results = self._collection.search(
+                data=query_embedding,
+                anns_field="embedding",
+                param=search_params,
+                limit=self.top_k,
+                output_fields=self._output_fields()
+            )
+
+        with tracer.span("context_assembly"):
+            documents = self._to_documents(results[0])
         # print("these are the retrieved dopcuments ---",documents)
 
         return documents
 
+    # ----------------------------------------------------------------------
+    def search_batch(self, query_embeddings: np.ndarray, limit: Optional[int] = None) -> List[List[Document]]:
+        """Search many precomputed query embeddings in one Milvus request."""
+        search_params = {"metric_type": "COSINE", "params": {"nprobe": 10}}
+        limit = limit or self.top_k
+
+        with tracer.span("milvus_search", top_k=limit, nq=len(query_embeddings)):
+            results = self._collection.search(
+                data=np.asarray(query_embeddings, dtype=np.float32),
+                anns_field="embedding",
+                param=search_params,
+                limit=limit,
+                output_fields=self._output_fields()
+            )
+
+        return [self._to_documents(hits) for hits in results]
+
     # ----------------------------------------------------------------------
     async def _aget_relevant_documents(self, query: str) -> List[Document]:
-        """Async retrieval support."""
-        return self._get_relevant_documents(query)
+        """Async retrieval support (off the event loop so concurrent queries can batch)."""
+        loop = asyncio.get_running_loop()
+        # run_in_executor does not propagate contextvars; copy them so spans nest under the request
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(None, ctx.run, self._get_relevant_documents, query)
+
+    # ----------------------------------------------------------------------
+    def embedding_metrics(self) -> dict:
+        """Micro-batching metrics, empty when batching is disabled."""
+        return self._batcher.metrics() if self._batcher is not None else {}
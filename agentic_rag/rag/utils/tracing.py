@@ -0,0 +1,272 @@
+"""
+Lightweight tracing and metrics for the RAG / agent pipeline.
+
+    from utils.tracing import tracer
+
+    with tracer.request("workflow", query=query):
+        with tracer.span("milvus_search"):
+            ...
+
+Every finished span feeds a latency histogram (p50/p95/p99) keyed by span
+name. Each finished request is logged as one structured JSON line with its
+span tree; requests slower than `slow_request_seconds` are logged at WARNING.
+`tracer.export_prometheus()` renders all metrics in the Prometheus text
+exposition format.
+
+Request logs go to the `agentic_rag.trace` logger, which is left for the
+application to configure: slow requests are logged at WARNING, every other
+request at INFO (its JSON is only built when INFO is enabled).
+"""
+
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("agentic_rag.trace")
+
+# Prometheus-style bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# For count-valued observations such as batch sizes
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attrs):
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        if parent is not None:
+            with _tree_lock:
+                parent.children.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            **({"attrs": self.attrs} if self.attrs else {}),
+            **({"error": self.error} if self.error else {}),
+            **({"children": [c.to_dict() for c in self.children]} if self.children else {}),
+        }
+
+
+_tree_lock = threading.Lock()
+
+
+class Histogram:
+    """Bucketed histogram plus a bounded sample window for percentiles."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 2048):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self.samples.append(value)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Tracer:
+    def __init__(self, slow_request_seconds: float = 2.0):
+        self.slow_request_seconds = slow_request_seconds
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = defaultdict(Histogram)
+        # Non-span distributions (batch sizes, queueing delays), exported as their own metrics
+        self._observations: Dict[str, Histogram] = {}
+        self._counters: Dict[tuple, float] = defaultdict(float)
+
+    # ------------------------------------------------------------------
+    # Spans
+    # ------------------------------------------------------------------
+    @contextmanager
+    def span(self, name: str, **attrs):
+        parent = _current_span.get()
+        span = Span(name, parent, **attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = repr(e)
+            self.incr("span_errors_total", span=name)
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.start
+            _current_span.reset(token)
+            with self._lock:
+                self._histograms[name].observe(span.duration)
+
+    @contextmanager
+    def request(self, name: str, **attrs):
+        """Root span for one request; logs the span tree when it finishes."""
+        token = _current_span.set(None)
+        try:
+            with self.span(name, **attrs) as root:
+                yield root
+        finally:
+            _current_span.reset(token)
+            self.incr("requests_total", request=name)
+            if root.duration >= self.slow_request_seconds:
+                self.incr("slow_requests_total", request=name)
+                logger.warning(json.dumps({"event": "slow_request", **root.to_dict()}, default=str))
+            elif logger.isEnabledFor(logging.INFO):
+                logger.info(json.dumps({"event": "request", **root.to_dict()}, default=str))
+
+    def traced(self, name: str):
+        """Decorator form of `span`, used to wrap graph nodes."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name: str, value: float, buckets=DEFAULT_BUCKETS):
+        """Record one sample of a named distribution (exported as `<prefix>_<name>`)."""
+        with self._lock:
+            h = self._observations.get(name)
+            if h is None:
+                h = self._observations[name] = Histogram(buckets)
+            h.observe(value)
+
+    # ------------------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------------------
+    def incr(self, name: str, value: float = 1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def cache_hit(self, cache: str, hit: bool):
+        self.incr("cache_hits_total" if hit else "cache_misses_total", cache=cache)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = {
+                name: {
+                    "count": h.count,
+                    "p50_ms": h.percentile(0.50) * 1000,
+                    "p95_ms": h.percentile(0.95) * 1000,
+                    "p99_ms": h.percentile(0.99) * 1000,
+                }
+                for name, h in self._histograms.items()
+            }
+            observations = {
+                name: {
+                    "count": h.count,
+                    "mean": h.total / h.count if h.count else 0.0,
+                    "p50": h.percentile(0.50),
+                    "p95": h.percentile(0.95),
+                    "p99": h.percentile(0.99),
+                }
+                for name, h in self._observations.items()
+            }
+            raw_counters = dict(self._counters)
+        counters = {
+            f"{name}{_labels(dict(labels))}": value
+            for (name, labels), value in raw_counters.items()
+        }
+        hits = defaultdict(lambda: [0.0, 0.0])
+        for (name, labels), value in raw_counters.items():
+            if name in ("cache_hits_total", "cache_misses_total"):
+                hits[dict(labels)["cache"]][name == "cache_misses_total"] += value
+        cache_hit_rate = {c: h / (h + m) for c, (h, m) in hits.items() if h + m}
+        return {"spans": spans, "observations": observations, "counters": counters,
+                "cache_hit_rate": cache_hit_rate}
+
+    def export_prometheus(self, prefix: str = "rag") -> str:
+        lines = []
+        with self._lock:
+            histograms = dict(self._histograms)
+            observations = dict(self._observations)
+            counters = dict(self._counters)
+
+        metric = f"{prefix}_span_duration_seconds"
+        lines += [f"# HELP {metric} Span latency.", f"# TYPE {metric} histogram"]
+        for name, h in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{_labels({"span": name, "le": bound})} {cumulative}')
+            lines.append(f'{metric}_sum{_labels({"span": name})} {h.total}')
+            lines.append(f'{metric}_count{_labels({"span": name})} {h.count}')
+
+        metric = f"{prefix}_span_latency_seconds"
+        lines += [f"# HELP {metric} Span latency quantiles over a recent window.",
+                  f"# TYPE {metric} summary"]
+        for name, h in sorted(histograms.items()):
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f'{metric}{_labels({"span": name, "quantile": q})} {h.percentile(q)}')
+            lines.append(f'{metric}_sum{_labels({"span": name})} {h.total}')
+            lines.append(f'{metric}_count{_labels({"span": name})} {h.count}')
+
+        for name, h in sorted(observations.items()):
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{_labels({"le": bound})} {cumulative}')
+            lines.append(f"{metric}_sum {h.total}")
+            lines.append(f"{metric}_count {h.count}")
+
+        seen = set()
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{prefix}_{name}"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} counter")
+                seen.add(metric)
+            lines.append(f"{metric}{_labels(dict(labels))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._observations.clear()
+            self._counters.clear()
+
+
+def peak_rss_mb() -> float:
+    """Process-wide peak resident set size in MB."""
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{str(v).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels.items())
+    return "{" + body + "}"
+
+
+tracer = Tracer(slow_request_seconds=float(os.getenv("RAG_SLOW_REQUEST_SECONDS", "2.0")))
@@ -0,0 +1,133 @@
+"""
+Round-trip tests for DeltaSqliteSaver: every checkpoint it returns must match
+what the stock in-memory saver returns for the same graph run, through
+deltas, appends, forks (update_state) and pruning.
+"""
+
+import os
+import sys
+from typing import Annotated
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+from typing_extensions import TypedDict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example_for_langgraph"))
+from delta_checkpointer import APPEND, FULL, SAME, DeltaSqliteSaver  # noqa: E402
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+    turns: int
+
+
+def reply(state: State):
+    return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")],
+            "turns": state.get("turns", 0) + 1}
+
+
+def build(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    builder.add_edge("reply", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def contents(state):
+    return [m.content for m in state.values.get("messages", [])], state.values.get("turns")
+
+
+def run_turns(graph, config, n, start=0):
+    for i in range(start, start + n):
+        graph.invoke({"messages": [HumanMessage(content=f"q{i}")]}, config)
+
+
+@pytest.fixture
+def saver(tmp_path):
+    saver = DeltaSqliteSaver(str(tmp_path / "checkpoints.db"), snapshot_every=4, cache_size=2)
+    yield saver
+    saver.conn.close()
+
+
+def history(graph, config):
+    return [(s.config["configurable"]["checkpoint_id"], contents(s)) for s in graph.get_state_history(config)]
+
+
+def test_history_matches_in_memory_saver(saver):
+    config = {"configurable": {"thread_id": "t"}}
+    delta, reference = build(saver), build(InMemorySaver())
+    run_turns(delta, config, 6)
+    run_turns(reference, config, 6)
+
+    saver._cache.clear()  # force replay from SQLite
+    assert [c for _, c in history(delta, config)] == [c for _, c in history(reference, config)]
+
+
+def test_growing_messages_are_stored_as_appends(saver):
+    config = {"configurable": {"thread_id": "t"}}
+    run_turns(build(saver), config, 3)
+
+    kinds = set()
+    for (blob, depth) in saver.conn.execute("SELECT channel_values, depth FROM checkpoints"):
+        record = saver._loads(blob)
+        if depth > 0 and "messages" in record:
+            kinds.add(record["messages"][0])
+    assert APPEND in kinds
+    assert kinds <= {APPEND, SAME, FULL}
+
+
+def test_in_place_mutation_does_not_corrupt_cached_parent(saver):
+    config = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+    values = {"messages": ["a", "b"]}
+    first = saver.put(config, {"id": "1", "channel_values": values, "channel_versions": {}},
+                      {}, {"messages": 1})
+
+    values["messages"].append("c")  # a node mutating the live list after the checkpoint
+    saver.put(first, {"id": "2", "channel_values": {"messages": ["a", "b", "c", "d"]},
+                      "channel_versions": {}}, {}, {"messages": 2})
+
+    saver._cache.clear()
+    assert saver._channel_values("t", "", "1") == {"messages": ["a", "b"]}
+    assert saver._channel_values("t", "", "2") == {"messages": ["a", "b", "c", "d"]}
+
+
+def test_fork_and_prune_round_trip(saver):
+    config = {"configurable": {"thread_id": "t"}}
+    graph = build(saver)
+    run_turns(graph, config, 3)
+
+    # Fork from an early checkpoint, then keep going on the fork
+    early = list(graph.get_state_history(config))[-3].config
+    forked = graph.update_state(early, {"messages": [HumanMessage(content="fork")]})
+    graph.invoke(None, forked)
+    run_turns(graph, config, 2, start=3)
+
+    before = dict(history(graph, config))
+    removed = saver.prune("t", keep_last=5)
+    assert removed == len(before) - 5
+
+    saver._cache.clear()
+    after = dict(history(graph, config))
+    assert len(after) == 5
+    for checkpoint_id, state in after.items():
+        assert state == before[checkpoint_id]
+
+
+def test_missing_chain_row_raises_lookup_error(saver):
+    config = {"configurable": {"thread_id": "t"}}
+    run_turns(build(saver), config, 2)
+    latest = saver.conn.execute(
+        "SELECT checkpoint_id, parent_checkpoint_id FROM checkpoints WHERE depth > 0 "
+        "ORDER BY checkpoint_id DESC LIMIT 1").fetchone()
+    saver.conn.execute("DELETE FROM checkpoints WHERE checkpoint_id = ?", (latest[1],))
+    saver._cache.clear()
+
+    with pytest.raises(LookupError):
+        saver._channel_values("t", "", latest[0])
@@ -0,0 +1,66 @@
+"""Per-version doc stores: disjoint ID ranges, routing by ID, and disk reclaimed on drop."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rag"))
+from utils.doc_store import VersionedDocStore  # noqa: E402
+
+
+def test_versions_get_disjoint_ids_and_readers_route_by_id(tmp_path):
+    writer = VersionedDocStore(str(tmp_path), readonly=False)
+    reader = VersionedDocStore(str(tmp_path))
+
+    v1 = writer.open_writer("docs_v1").append(["a", "b"]).tolist()
+    v2 = writer.open_writer("docs_v2").append(["a2", "b2", "c2"]).tolist()
+    assert v1 == [0, 1] and v2 == [2, 3, 4]
+
+    # The reader opened before either version existed and picks both up on demand
+    assert reader.get_many([4, 0, 2]) == ["c2", "a", "a2"]
+    writer.close()
+    reader.close()
+
+
+def test_drop_removes_files_and_never_reuses_ids(tmp_path):
+    writer = VersionedDocStore(str(tmp_path), readonly=False)
+    writer.open_writer("docs_v1").append(["a"])
+    writer.open_writer("docs_v2").append(["b", "c"])
+
+    writer.drop("docs_v2")
+    assert not os.path.exists(tmp_path / "docs_v2")
+    assert writer.open_writer("docs_v3").append(["d"]).tolist() == [3]
+
+    writer.drop("docs_v1")
+    writer.close()
+    reader = VersionedDocStore(str(tmp_path))
+    assert reader.get(3) == "d"
+    with pytest.raises(KeyError):
+        reader.get(0)
+    reader.close()
+
+
+def test_only_newest_store_accepts_appends(tmp_path):
+    writer = VersionedDocStore(str(tmp_path), readonly=False)
+    writer.open_writer("docs_v1").append(["a"])
+    writer.open_writer("docs_v2").append(["b"])
+    with pytest.raises(RuntimeError):
+        writer.open_writer("docs_v1")
+    writer.close()
+
+
+def test_single_writer_per_root(tmp_path):
+    writer = VersionedDocStore(str(tmp_path), readonly=False)
+    with pytest.raises(RuntimeError):
+        VersionedDocStore(str(tmp_path), readonly=False)
+    writer.close()
+
+
+def test_rename_keeps_ids(tmp_path):
+    writer = VersionedDocStore(str(tmp_path), readonly=False)
+    writer.open_writer("docs").append(["a", "b"])
+    writer.rename("docs", "docs_v0")
+    assert writer.get_many([0, 1]) == ["a", "b"]
+    assert writer.open_writer("docs_v5").append(["c"]).tolist() == [2]
+    writer.close()
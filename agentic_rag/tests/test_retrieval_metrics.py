@@ -0,0 +1,80 @@
+"""Invariants of the vectorized retrieval metrics and the evaluator's retrieval paths."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rag"))
+from evaluation.retreival_eval import RetrievalEvaluator, compute_metrics  # noqa: E402
+
+
+def unit(rows):
+    rows = np.asarray(rows, dtype=np.float32)
+    return rows / np.linalg.norm(rows, axis=-1, keepdims=True)
+
+
+def test_near_duplicate_hits_do_not_push_ndcg_above_one():
+    # One relevant chunk, three retrieved copies of it
+    retrieved = unit([[[1, 0, 0]] * 3])
+    relevant = unit([[[1, 0, 0]]])
+    m = compute_metrics(retrieved, np.ones((1, 3), bool), relevant, np.ones((1, 1), bool), [1, 3])
+    assert m[3]["ndcg"][0] == pytest.approx(1.0)
+    assert m[3]["precision"][0] == pytest.approx(1.0)
+    assert m[3]["recall"][0] == pytest.approx(1.0)
+
+
+def test_metrics_stay_in_unit_interval_on_random_inputs():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        retrieved = unit(rng.normal(size=(4, 6, 5)))
+        relevant = unit(rng.normal(size=(4, 3, 5)))
+        per_k = compute_metrics(retrieved, rng.random((4, 6)) > 0.2, relevant, rng.random((4, 3)) > 0.3,
+                                [1, 3, 5], threshold=0.3)
+        for metrics in per_k.values():
+            for values in metrics.values():
+                assert np.all((values >= 0.0) & (values <= 1.0 + 1e-9))
+
+
+def test_precision_divides_by_results_actually_returned():
+    retrieved = unit([[[1, 0, 0], [0, 1, 0], [0, 0, 1]]])
+    relevant = unit([[[1, 0, 0]]])
+    mask = np.array([[True, False, False]])
+    m = compute_metrics(retrieved, mask, relevant, np.ones((1, 1), bool), [3])
+    assert m[3]["precision"][0] == pytest.approx(1.0)
+
+
+# ----------------------------------------------------------------------
+class OneHotEncoder:
+    """Encodes each distinct text to its own axis, so only identical texts match."""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+        self.axes = {}
+
+    def encode(self, texts, **kwargs):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            out[i, self.axes.setdefault(text, len(self.axes))] = 1.0
+        return out
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+
+def test_plain_langchain_retriever_goes_through_public_batch_api():
+    pytest.importorskip("langchain_core")
+    from langchain_core.documents import Document
+    from langchain_core.retrievers import BaseRetriever
+
+    class ListRetriever(BaseRetriever):
+        def _get_relevant_documents(self, query, *, run_manager):
+            return [Document(page_content=f"{query}-a"), Document(page_content=f"{query}-b")]
+
+    dataset = [{"query": "q1", "relevant_chunks": ["q1-b"]}, {"query": "q2", "relevant_chunks": ["x"]}]
+    report = RetrievalEvaluator(ListRetriever(), k_values=(1, 2), model=OneHotEncoder()).evaluate(dataset)
+
+    assert report["per_query"][0]["metrics"]["@2"]["recall"] == pytest.approx(1.0)
+    assert report["per_query"][0]["metrics"]["@2"]["mrr"] == pytest.approx(0.5)
+    assert report["per_query"][1]["metrics"]["@2"]["recall"] == 0.0